@@ -1,3 +1,29 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
+from common_utils.data.annotation.core import read_annotation
+from common_utils.data.annotation.columnar import to_columnar, pascal_voc_objects, pascal_voc_labels
 
-# Create your tests here.
+
+class PascalVocLabelsTests(SimpleTestCase):
+    boxes_per_image = [
+        [(0, [0.1, 0.2, 0.4, 0.6]), (2, [0.05, 0.5, 0.95, 0.75])],
+        [],
+        [(1, [0.25, 0.125, 0.5, 0.875])],
+    ]
+
+    def test_objects_match_per_object_output(self):
+        image_index, class_id, xyxy = to_columnar(self.boxes_per_image)
+        expected = [
+            "".join(read_annotation(bbox=bbox, label=label, format="pascal") for label, bbox in boxes)
+            for boxes in self.boxes_per_image
+        ]
+        self.assertEqual(pascal_voc_objects(image_index, class_id, xyxy, len(self.boxes_per_image)), expected)
+
+    def test_labels_are_pixel_documents(self):
+        image_index, class_id, xyxy = to_columnar(self.boxes_per_image)
+        images = [{"file_name": f"img{i}.jpg", "width": 200, "height": 100} for i in range(3)]
+        documents = pascal_voc_labels(image_index, class_id, xyxy, images, {0: "car", 1: "person", 2: "bus"})
+
+        self.assertEqual(len(documents), 3)
+        self.assertIn("<object><name>car</name><bndbox><xmin>20</xmin><ymin>20</ymin><xmax>80</xmax><ymax>60</ymax></bndbox></object>", documents[0])
+        self.assertNotIn("<object>", documents[1])
+        self.assertIn("<filename>img2.jpg</filename><size><width>200</width><height>100</height>", documents[2])
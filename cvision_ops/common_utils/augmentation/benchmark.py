@@ -0,0 +1,177 @@
+"""
+Augmentation throughput benchmark on synthetic images.
+
+Measures the per-transform latency of every entry of PREDEFINED_AUGMENTATIONS
+and the throughput of a full policy on the serial, thread-pool and
+process-pool engines, to size the create_version workers.
+
+    python -m common_utils.augmentation.benchmark --images 64 --size 1920x1080 --multiplier 3
+"""
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import warnings
+import tempfile
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from .core import AugmentationPipeline, PREDEFINED_AUGMENTATIONS
+from .engine import AugmentationEngine, AUGMENTATION_WORKERS, image_seed
+from .registry import get_augmentation_pipeline
+
+
+def synthetic_images(count: int, width: int, height: int, boxes: int, seed: int = 0):
+    """
+    Yield (image, annotations) pairs with smooth random content and random boxes.
+
+    Images are upscaled from a small noise grid so they compress and blur like
+    photos rather than white noise.
+    """
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        grid = rng.integers(0, 255, (max(2, height // 32), max(2, width // 32), 3), dtype=np.uint8)
+        image = cv2.resize(grid, (width, height), interpolation=cv2.INTER_CUBIC)
+        xy = rng.uniform(0.0, 0.7, (boxes, 2))
+        wh = rng.uniform(0.05, 0.3, (boxes, 2))
+        bboxes = np.clip(np.concatenate([xy, xy + wh], axis=1), 0.0, 1.0)
+        yield image, {"bboxes": bboxes.tolist(), "labels": rng.integers(0, 10, boxes).tolist()}
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak resident set size so far of this process and of its (reaped) children."""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples) * 1000
+    return {"p50_ms": float(np.percentile(values, 50)), "p99_ms": float(np.percentile(values, 99))}
+
+
+def bench_transforms(images, repeat: int = 1) -> Dict[str, Dict]:
+    """Latency of each predefined transform on its own, forced to always apply."""
+    results = {}
+    for aug in PREDEFINED_AUGMENTATIONS:
+        pipeline = get_augmentation_pipeline([{"name": aug["name"], "params": {**aug["params"], "p": 1.0}}])
+        timings = []
+        for _ in range(repeat):
+            for image, annotations in images:
+                start = time.perf_counter()
+                pipeline(image=image, bboxes=annotations["bboxes"], category_ids=annotations["labels"])
+                timings.append(time.perf_counter() - start)
+        results[aug["name"]] = percentiles(timings)
+    return results
+
+
+def bench_engine(engine: str, images, multiplier: int, workers: int, output_dir: str) -> Dict:
+    """Throughput of the full predefined policy on one engine."""
+    kwargs = {"user_selected_augmentations": PREDEFINED_AUGMENTATIONS, "multiplier": multiplier, "in_memory": True}
+    timings = []
+
+    def timed(fn, *args, **kw):
+        start = time.perf_counter()
+        result = fn(*args, **kw)
+        timings.append(time.perf_counter() - start)
+        return result
+
+    start = time.perf_counter()
+    if engine == "thread":
+        pipeline = AugmentationPipeline(output_dir=output_dir)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    timed, pipeline.apply_augmentations_policy,
+                    image=image, annotations=annotations, annotation_type="detection",
+                    file_name_prefix=f"image_{i}", seed=image_seed(f"image_{i}"), **kwargs,
+                )
+                for i, (image, annotations) in enumerate(images)
+            ]
+            samples = sum(len(future.result()) for future in futures)
+    else:
+        with AugmentationEngine(output_dir=output_dir, workers=0 if engine == "serial" else workers) as aug_engine:
+            if engine == "serial":
+                samples = sum(
+                    len(timed(aug_engine.augment, image, annotations=annotations, file_name_prefix=f"image_{i}", **kwargs))
+                    for i, (image, annotations) in enumerate(images)
+                )
+            else:
+                # Worker start-up is excluded, as a long-lived pool would amortize it.
+                warmup = [
+                    aug_engine.submit(images[0][0], annotations=images[0][1], file_name_prefix=f"warmup_{i}", **kwargs)
+                    for i in range(workers)
+                ]
+                for future in warmup:
+                    future.result()
+                start = time.perf_counter()
+                futures = [
+                    aug_engine.submit(image, annotations=annotations, file_name_prefix=f"image_{i}", **kwargs)
+                    for i, (image, annotations) in enumerate(images)
+                ]
+                samples = sum(len(future.result()) for future in futures)
+    duration = time.perf_counter() - start
+
+    result = {
+        "engine": engine,
+        "workers": 1 if engine == "serial" else workers,
+        "images_per_sec": len(images) / duration,
+        "samples_per_sec": samples / duration,
+        "seconds": duration,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if timings:
+        result.update(percentiles(timings))
+    return result
+
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark augmentation throughput on synthetic images")
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--size", default="1920x1080", help="WIDTHxHEIGHT of the synthetic images")
+    parser.add_argument("--boxes", type=int, default=10, help="Boxes per image")
+    parser.add_argument("--multiplier", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=AUGMENTATION_WORKERS)
+    parser.add_argument("--engines", default="serial,thread,process")
+    parser.add_argument("--skip-transforms", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+    # Pixel-level transforms warn that they ignore the bbox processor.
+    warnings.filterwarnings("ignore", category=UserWarning, module="albumentations")
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    images = list(synthetic_images(args.images, width, height, args.boxes))
+    report = {
+        "config": {**vars(args), "cpu_count": os.cpu_count()},
+        "transforms": {},
+        "engines": [],
+    }
+
+    if not args.skip_transforms:
+        report["transforms"] = bench_transforms(images)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for engine in args.engines.split(","):
+            report["engines"].append(bench_engine(engine.strip(), images, args.multiplier, args.workers, output_dir))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        sys.exit(0)
+
+    print(f"{args.images} images {width}x{height}, {args.boxes} boxes, multiplier {args.multiplier}, {os.cpu_count()} CPUs")
+    for name, stats in report["transforms"].items():
+        print(f"  {name:<24} p50 {stats['p50_ms']:8.2f} ms   p99 {stats['p99_ms']:8.2f} ms")
+    for result in report["engines"]:
+        latency = f"   p50 {result['p50_ms']:8.2f} ms   p99 {result['p99_ms']:8.2f} ms" if "p50_ms" in result else ""
+        print(
+            f"  {result['engine']:<8} x{result['workers']:<3} {result['images_per_sec']:8.2f} img/s "
+            f"{result['samples_per_sec']:8.2f} samples/s{latency}   "
+            f"peak RSS {result['peak_rss_mb']['self']:.0f} MB (children {result['peak_rss_mb']['children']:.0f} MB)"
+        )
@@ -1,14 +1,55 @@
+import os
 import cv2
 import json
 import hashlib
 import numpy as np
 import albumentations as A
-from albumentations import CoarseDropout
 from pathlib import Path
-from typing import List, Dict, Union
+from typing import List, Dict, NamedTuple, Optional, Union
 from .utils import (
-    save_annotations, save_image
+    save_annotations, save_image, encode_image, decode_image
 )
+from .registry import (
+    build_augmentation_pipeline, build_preprocessing_pipeline, get_augmentation_pipeline,
+    policy_from_dataset_augmentation, policy_option, preprocess_target_size
+)
+from .hashing import Deduplicator
+
+AUGMENTATION_SPILL_BYTES = int(os.getenv("AUGMENTATION_SPILL_BYTES", 0))
+
+
+class AugmentedSample(NamedTuple):
+    """
+    In-memory output of `apply_augmentations_policy(..., in_memory=True)`.
+
+    Exactly one of `image_bytes` (encoded JPEG) and `image_path` (spilled to
+    disk because it exceeded the spill threshold) is set. `bboxes` are
+    normalized; `width` and `height` are the size of the augmented image.
+    """
+    name: str
+    image_bytes: Optional[bytes]
+    image_path: Optional[str]
+    bboxes: np.ndarray
+    labels: np.ndarray
+    annotation_type: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+    def read_image(self) -> bytes:
+        if self.image_bytes is not None:
+            return self.image_bytes
+        return Path(self.image_path).read_bytes()
+
+    def annotation(self) -> Dict:
+        """Return the annotation in the same layout as `save_annotations` writes, with the image size."""
+        return {
+            "type": self.annotation_type,
+            "bboxes": self.bboxes.tolist(),
+            "labels": self.labels.tolist(),
+            "width": self.width,
+            "height": self.height,
+        }
+
 
 class AugmentationPipeline:
     def __init__(self, output_dir):
@@ -38,11 +79,7 @@ class AugmentationPipeline:
         Returns:
             A.Compose: Preprocessing pipeline.
         """
-        transforms = []
-        for setting in preprocess_settings:
-            if setting["name"] == "resize":
-                transforms.append(A.Resize(**setting["params"]))
-        return A.Compose(transforms)
+        return build_preprocessing_pipeline(preprocess_settings)
 
     def create_augmentation_pipeline(self, augmentations: List[Dict]) -> A.Compose:
         """
@@ -54,51 +91,34 @@ class AugmentationPipeline:
         Returns:
             A.Compose: Augmentation pipeline.
         """
-        transforms = []
-        for aug in augmentations:
-            if aug["name"] == "horizontal_flip":
-                transforms.append(A.HorizontalFlip(**aug["params"]))
-            elif aug["name"] == "vertical_flip":
-                transforms.append(A.VerticalFlip(**aug["params"]))
-            elif aug["name"] == "rotate":
-                transforms.append(A.Affine(**aug["params"]))
-            elif aug["name"] == "gaussian_blur":
-                transforms.append(A.GaussianBlur(**aug["params"]))
-            elif aug["name"] == "brightness":
-                transforms.append(A.RandomBrightnessContrast(**aug["params"]))
-            elif aug["name"] == "contrast":
-                transforms.append(A.RandomBrightnessContrast(**aug["params"]))
-            elif aug["name"] == "random_crop":
-                transforms.append(A.RandomCrop(**aug["params"]))
-            elif aug["name"] == "scale":
-                transforms.append(A.RandomScale(**aug["params"]))
-            elif aug["name"] == "shear":
-                transforms.append(A.Affine(**aug["params"]))
-            elif aug["name"] == "sharpen":
-                transforms.append(A.Sharpen(**aug["params"]))
-            elif aug["name"] == "color_jitter":
-                transforms.append(A.ColorJitter(**aug["params"]))
-            elif aug["name"] == "elastic_transform":
-                transforms.append(A.ElasticTransform(**aug["params"]))
-            elif aug["name"] == "grid_distortion":
-                transforms.append(A.GridDistortion(**aug["params"]))
-            elif aug["name"] == "optical_distortion":
-                transforms.append(A.OpticalDistortion(**aug["params"]))
-            elif aug["name"] == "motion_blur":
-                transforms.append(A.MotionBlur(**aug["params"]))
-            elif aug["name"] == "random_shadow":
-                transforms.append(A.RandomShadow(**aug["params"]))
-            elif aug["name"] == "random_sun_flare":
-                transforms.append(A.RandomSunFlare(**aug["params"]))
-            elif aug["name"] == "hue_saturation_value":
-                transforms.append(A.HueSaturationValue(**aug["params"]))
-            elif aug["name"] == "cutout":
-                transforms.append(CoarseDropout(**aug["params"]))
-            else:
-                raise ValueError(f"Unsupported augmentation: {aug['name']}")
-
-        return A.Compose(
-            transforms, bbox_params=A.BboxParams(format="albumentations", label_fields=["category_ids"])
+        return build_augmentation_pipeline(augmentations)
+
+    def decode(self, file_bytes, preprocess_settings=None):
+        """
+        Decode an image once for all of its augmentation draws.
+
+        When the preprocessing resizes, JPEGs are decoded at the smallest reduced
+        scale that still covers the target size.
+        """
+        return decode_image(file_bytes, min_size=preprocess_target_size(preprocess_settings))
+
+    def to_sample(self, name, image, bboxes, labels, annotation_type, spill_bytes=AUGMENTATION_SPILL_BYTES) -> AugmentedSample:
+        """Encode an augmented image, spilling it to `output_dir` when larger than `spill_bytes`."""
+        image_bytes, image_path = encode_image(image), None
+        if spill_bytes and len(image_bytes) > spill_bytes:
+            image_path = str(self.output_dir / f"{name}.jpg")
+            Path(image_path).write_bytes(image_bytes)
+            image_bytes = None
+
+        return AugmentedSample(
+            name=name,
+            image_bytes=image_bytes,
+            image_path=image_path,
+            bboxes=np.asarray(bboxes, dtype=np.float64).reshape(-1, 4),
+            labels=np.asarray(labels, dtype=np.int64),
+            annotation_type=annotation_type,
+            width=int(image.shape[1]),
+            height=int(image.shape[0]),
         )
 
     def apply_augmentations_policy(
@@ -110,6 +130,10 @@ class AugmentationPipeline:
         user_selected_augmentations,
         multiplier=1,
         preprocess_pipeline=None,
+        seed=None,
+        in_memory=False,
+        spill_bytes=AUGMENTATION_SPILL_BYTES,
+        dedup=None,
     ):
         """
         Apply augmentations based on the augmentation policy.
@@ -119,26 +143,50 @@ class AugmentationPipeline:
             annotations (dict): Original annotations.
             annotation_type (str): Type of annotations ('detection', 'segmentation', 'classification').
             file_name_prefix (str): Prefix for augmented file naming.
-            user_selected_augmentations (list): List of augmentations and parameters.
+            user_selected_augmentations (list): List of augmentations and parameters, or a DatasetAugmentation row.
             multiplier (int): Number of augmented versions to generate for each source image.
-            preprocess_pipeline (A.Compose): Preprocessing pipeline to apply before augmentations.
+            preprocess_pipeline (A.Compose or list): Preprocessing pipeline (or its settings) applied once;
+                its output is kept as a sample and is the input of every augmentation draw.
+            seed (int, optional): Seed for the random draws, for reproducible outputs.
+            in_memory (bool): Return encoded samples instead of writing image and label files.
+            spill_bytes (int): In memory mode, images larger than this are written to disk (0 disables spilling).
+            dedup (str or dict, optional): Hasher name or {"hasher", "threshold"} used to drop duplicate samples;
+                defaults to the policy's "dedup" entry, then AUGMENTATION_DEDUP.
 
         Returns:
-            List[str]: List of augmented image paths.
+            List[Dict]: {"image": path, "label": path} of each augmented sample,
+                or List[AugmentedSample] in memory mode.
         """
         augmented_images = []
-        seen_hashes = set()
+        if not isinstance(user_selected_augmentations, (list, tuple)):
+            user_selected_augmentations = policy_from_dataset_augmentation(user_selected_augmentations)
+        deduplicator = Deduplicator.from_settings(
+            dedup if dedup is not None else policy_option(user_selected_augmentations, "dedup")
+        )
+
+        if isinstance(preprocess_pipeline, (list, tuple)):
+            preprocess_pipeline = build_preprocessing_pipeline(preprocess_pipeline) if preprocess_pipeline else None
 
         if preprocess_pipeline:
             preprocessed = preprocess_pipeline(image=image)
             image_preprocessed = preprocessed["image"]
-            hash_val = self.hash_image(image_preprocessed)
-            if hash_val not in seen_hashes:
-                seen_hashes.add(hash_val)
-                path = save_image(self.output_dir, f"{file_name_prefix}_preprocessed", image_preprocessed)
-                augmented_images.append(path)
+            # Every draw starts from the preprocessed image instead of the full-resolution one.
+            image = image_preprocessed
+            if not deduplicator.is_duplicate(image_preprocessed):
+                if in_memory:
+                    augmented_images.append(self.to_sample(
+                        f"{file_name_prefix}_preprocessed", image_preprocessed, annotations.get("bboxes", []), annotations.get("labels", []), annotation_type, spill_bytes
+                    ))
+                else:
+                    path = save_image(self.output_dir, f"{file_name_prefix}_preprocessed", image_preprocessed)
+                    augmented_images.append(path)
+
+        augmentation_pipeline = get_augmentation_pipeline(user_selected_augmentations)
+        if seed is not None:
+            # Only the pipeline's own generators are seeded: the process-wide ones are
+            # shared by concurrently augmenting threads. Pipelines are cached per thread.
+            augmentation_pipeline.set_random_seed(seed)
 
-        augmentation_pipeline = self.create_augmentation_pipeline(user_selected_augmentations)
         for i in range(multiplier - 1):
             augmented = augmentation_pipeline(
                 image=image,
@@ -147,11 +195,15 @@ class AugmentationPipeline:
             )
 
             augmented_image = augmented["image"]
-            hash_val = self.hash_image(augmented_image)
 
             # Avoid duplicates
-            if hash_val not in seen_hashes:
-                seen_hashes.add(hash_val)
+            if not deduplicator.is_duplicate(augmented_image):
+                if in_memory:
+                    augmented_images.append(self.to_sample(
+                        f"{file_name_prefix}_augmented_{i + 1}", augmented_image, augmented["bboxes"], augmented["category_ids"], annotation_type, spill_bytes
+                    ))
+                    continue
+
                 path = save_image(self.output_dir, f"{file_name_prefix}_augmented_{i + 1}", augmented_image)
                 annotation_path = save_annotations(
                     self.output_dir, f"{file_name_prefix}_augmented_{i + 1}", augmented["bboxes"], augmented["category_ids"], annotation_type=annotation_type
@@ -0,0 +1,198 @@
+import os
+import zlib
+import threading
+import multiprocessing
+import numpy as np
+from multiprocessing import shared_memory
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Union
+from .core import AugmentationPipeline, AUGMENTATION_SPILL_BYTES
+from .registry import policy_from_dataset_augmentation
+
+# Shared by every engine of the process (API requests, Celery tasks), so kept small by default.
+AUGMENTATION_WORKERS = int(os.getenv("AUGMENTATION_WORKERS", max(1, min(4, (os.cpu_count() or 1) // 2))))
+AUGMENTATION_SEED = int(os.getenv("AUGMENTATION_SEED", 0))
+AUGMENTATION_START_METHOD = os.getenv("AUGMENTATION_START_METHOD", "spawn")
+
+_worker_pipelines: Dict[str, AugmentationPipeline] = {}
+_shared_pool: Optional[ProcessPoolExecutor] = None
+_shared_pool_lock = threading.Lock()
+
+
+def image_seed(key: str, base_seed: int = AUGMENTATION_SEED) -> int:
+    """
+    Return a deterministic seed for one source image.
+
+    The seed only depends on `base_seed` and the image key (e.g. its file name),
+    so results are reproducible regardless of worker count or processing order.
+    """
+    return zlib.crc32(f"{base_seed}:{key}".encode("utf-8"))
+
+
+def _init_worker():
+    import cv2
+    # One OpenCV thread per worker process; the pool provides the parallelism.
+    cv2.setNumThreads(1)
+
+
+def _create_pool(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(AUGMENTATION_START_METHOD),
+        initializer=_init_worker,
+    )
+
+
+def get_augmentation_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Return the process pool shared by all engines of this process, creating it on first use.
+
+    Returns None (augment inline) when pooling is disabled or the current
+    process is daemonic and may not start children. A pool broken by a
+    crashed worker is replaced.
+    """
+    global _shared_pool
+    if AUGMENTATION_WORKERS <= 0 or multiprocessing.current_process().daemon:
+        return None
+
+    with _shared_pool_lock:
+        if _shared_pool is None or getattr(_shared_pool, "_broken", False):
+            _shared_pool = _create_pool(AUGMENTATION_WORKERS)
+        return _shared_pool
+
+
+def _augment_shared(shm_name: str, shape: tuple, dtype: str, output_dir: str, kwargs: Dict) -> List[Dict]:
+    pipeline = _worker_pipelines.get(output_dir)
+    if pipeline is None:
+        pipeline = _worker_pipelines[output_dir] = AugmentationPipeline(output_dir=output_dir)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        image = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        result = pipeline.apply_augmentations_policy(image=image, **kwargs)
+        del image
+        return result
+    finally:
+        shm.close()
+
+
+class AugmentationEngine:
+    """
+    Runs `AugmentationPipeline.apply_augmentations_policy` on a process pool.
+
+    Decoded images are handed to the workers through shared memory instead of
+    being pickled, and every image is augmented with `image_seed(file_name_prefix)`
+    so outputs are reproducible. Augmented files are written to `output_dir` by
+    the workers; results are the same as the pipeline's.
+
+    By default engines share one pool of AUGMENTATION_WORKERS processes, so
+    concurrent requests and tasks do not each start their own; an explicit
+    `workers` count gets a private pool, shut down on `close`. With `workers=0`,
+    or when running inside a daemonic process (e.g. a Celery prefork child,
+    which may not start children), augmentations run inline.
+    """
+
+    def __init__(self, output_dir: str, workers: Optional[int] = None, base_seed: int = AUGMENTATION_SEED):
+        self.output_dir = str(output_dir)
+        self.base_seed = base_seed
+        self.pipeline = AugmentationPipeline(output_dir=self.output_dir)
+        self._private = workers is not None
+        self._executor = None
+        if multiprocessing.current_process().daemon:
+            self.workers = 0
+        elif self._private:
+            self.workers = workers
+            self._executor = _create_pool(workers) if workers > 0 else None
+        else:
+            self._executor = get_augmentation_pool()
+            self.workers = AUGMENTATION_WORKERS if self._executor else 0
+
+    def submit(
+        self,
+        image: np.ndarray,
+        annotations: Dict,
+        file_name_prefix: str,
+        user_selected_augmentations: List[Dict],
+        multiplier: int = 1,
+        annotation_type: str = "detection",
+        in_memory: bool = False,
+        spill_bytes: int = AUGMENTATION_SPILL_BYTES,
+        dedup: Optional[Union[str, Dict]] = None,
+        preprocess_settings: Optional[List[Dict]] = None,
+        seed: Optional[int] = None,
+    ) -> Future:
+        """
+        Schedule the augmentation of one image.
+
+        Args:
+            image (np.ndarray): Decoded source image.
+            annotations (dict): {"bboxes": [...], "labels": [...]}.
+            file_name_prefix (str): Prefix for augmented file naming; also keys the seed.
+            user_selected_augmentations (list): List of augmentations and parameters, or a DatasetAugmentation row.
+            multiplier (int): Number of augmented versions to generate for the source image.
+            annotation_type (str): Type of annotations.
+            in_memory (bool): Return `AugmentedSample`s instead of writing files.
+            spill_bytes (int): In memory mode, images larger than this are written to disk.
+            dedup (str or dict, optional): Dedup hasher settings; see `apply_augmentations_policy`.
+            preprocess_settings (list, optional): Preprocessing applied once before all draws.
+            seed (int, optional): Seed to use instead of `image_seed(file_name_prefix)`, e.g. one stored with a lazy policy.
+
+        Returns:
+            Future: Resolves to the list of {"image": path, "label": path} dicts, or of
+                `AugmentedSample`s in memory mode.
+        """
+        if not isinstance(user_selected_augmentations, (list, tuple)):
+            # Workers only receive the plain policy, never the model instance.
+            user_selected_augmentations = policy_from_dataset_augmentation(user_selected_augmentations)
+
+        kwargs = {
+            "annotations": annotations,
+            "annotation_type": annotation_type,
+            "file_name_prefix": file_name_prefix,
+            "user_selected_augmentations": user_selected_augmentations,
+            "multiplier": multiplier,
+            "seed": seed if seed is not None else image_seed(file_name_prefix, self.base_seed),
+            "in_memory": in_memory,
+            "spill_bytes": spill_bytes,
+            "dedup": dedup,
+            "preprocess_pipeline": preprocess_settings,
+        }
+
+        if self._executor is None:
+            future = Future()
+            try:
+                future.set_result(self.pipeline.apply_augmentations_policy(image=image, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        image = np.ascontiguousarray(image)
+        shm = shared_memory.SharedMemory(create=True, size=max(image.nbytes, 1))
+        np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)[...] = image
+        try:
+            future = self._executor.submit(_augment_shared, shm.name, image.shape, image.dtype.str, self.output_dir, kwargs)
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+
+        def release(_):
+            shm.close()
+            shm.unlink()
+
+        future.add_done_callback(release)
+        return future
+
+    def augment(self, image: np.ndarray, **kwargs) -> List[Dict]:
+        """Augment one image and wait for the result; see `submit`."""
+        return self.submit(image, **kwargs).result()
+
+    def close(self):
+        if self._private and self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,103 @@
+import os
+import cv2
+import hashlib
+import numpy as np
+from typing import Dict, List, Optional, Union
+
+try:
+    import xxhash
+except ImportError:  # optional dependency; blake2b is the exact-hash fallback
+    xxhash = None
+
+AUGMENTATION_DEDUP = os.getenv("AUGMENTATION_DEDUP", "exact")
+PERCEPTUAL_HASH_SIZE = 8
+
+
+def md5_hash(image: np.ndarray) -> str:
+    return hashlib.md5(image.tobytes()).hexdigest()
+
+
+def exact_hash(image: np.ndarray) -> str:
+    """Fast exact hash of the pixel buffer (xxh3 when installed, blake2b otherwise)."""
+    data = np.ascontiguousarray(image)
+    if xxhash is not None:
+        return xxhash.xxh3_64_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def _thumbnail(image: np.ndarray, size: tuple) -> np.ndarray:
+    # Subsample by striding first so large frames cost about as much as small ones.
+    step = max(1, min(image.shape[0], image.shape[1]) // (16 * max(size)))
+    image = np.ascontiguousarray(image[::step, ::step])
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def dhash(image: np.ndarray, hash_size: int = PERCEPTUAL_HASH_SIZE) -> int:
+    """Difference hash: sign of horizontal gradients of a (hash_size+1, hash_size) thumbnail."""
+    thumbnail = _thumbnail(image, (hash_size + 1, hash_size))
+    bits = (thumbnail[:, 1:] > thumbnail[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def ahash(image: np.ndarray, hash_size: int = PERCEPTUAL_HASH_SIZE) -> int:
+    """Average hash: pixels of a (hash_size, hash_size) thumbnail above its mean."""
+    thumbnail = _thumbnail(image, (hash_size, hash_size))
+    bits = (thumbnail > thumbnail.mean()).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+# name -> (hash function, perceptual)
+HASHERS: Dict[str, tuple] = {
+    "md5": (md5_hash, False),
+    "exact": (exact_hash, False),
+    "dhash": (dhash, True),
+    "ahash": (ahash, True),
+}
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class Deduplicator:
+    """
+    Tracks the samples generated from one source image and flags duplicates.
+
+    Exact hashers only match identical frames; perceptual hashers (dhash, ahash)
+    also treat frames within `threshold` differing bits as duplicates, so e.g. a
+    barely blurred copy is not stored twice. `hasher="none"` disables dedup.
+    """
+
+    def __init__(self, hasher: str = AUGMENTATION_DEDUP, threshold: int = 0):
+        if hasher != "none" and hasher not in HASHERS:
+            raise ValueError(f"Unsupported hasher: {hasher}")
+        self.hasher = hasher
+        self.threshold = threshold
+        self.seen: List = []
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Union[str, Dict]] = None) -> "Deduplicator":
+        """Build from a hasher name or {"hasher": ..., "threshold": ...}; None uses AUGMENTATION_DEDUP."""
+        if settings is None:
+            return cls()
+        if isinstance(settings, str):
+            return cls(hasher=settings)
+        return cls(hasher=settings.get("hasher", AUGMENTATION_DEDUP), threshold=int(settings.get("threshold", 0)))
+
+    def is_duplicate(self, image: np.ndarray) -> bool:
+        """Return True if `image` duplicates a previous sample; otherwise remember it."""
+        if self.hasher == "none":
+            return False
+
+        hash_fn, perceptual = HASHERS[self.hasher]
+        value = hash_fn(image)
+        if perceptual and self.threshold:
+            if any(hamming_distance(value, seen) <= self.threshold for seen in self.seen):
+                return True
+        elif value in self.seen:
+            return True
+
+        self.seen.append(value)
+        return False
@@ -0,0 +1,88 @@
+import os
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+from .core import AugmentationPipeline, AugmentedSample
+from .engine import AugmentationEngine, image_seed
+
+# VersionImageAugmentation rows with this name only hold a seeded policy in `parameters`;
+# their samples are produced when the version is exported.
+LAZY_AUGMENTATION_NAME = "lazy"
+VERSION_LAZY_AUGMENTATION = os.getenv("VERSION_LAZY_AUGMENTATION", "false").lower() in ("1", "true", "yes")
+LAZY_AUGMENTATION_DIR = os.getenv("LAZY_AUGMENTATION_DIR", "/tmp/augmented_dataset/lazy")
+
+
+def lazy_parameters(policy: List[Dict], file_name_prefix: str, multiplier: int = 1, preprocess: Optional[List[Dict]] = None) -> Dict:
+    """
+    Return the `parameters` of a lazy augmentation row.
+
+    The seed is the same one `AugmentationEngine` uses, so materializing later
+    gives the samples eager augmentation would have stored.
+    """
+    return {
+        "policy": policy,
+        "seed": image_seed(file_name_prefix),
+        "multiplier": multiplier,
+        "file_name_prefix": file_name_prefix,
+        "preprocess": preprocess,
+    }
+
+
+def materialize(
+    image_bytes: bytes,
+    parameters: Dict,
+    annotations: Dict,
+    pipeline: Optional[AugmentationPipeline] = None,
+) -> List[AugmentedSample]:
+    """
+    Produce the augmented samples of a lazy augmentation row.
+
+    Args:
+        image_bytes (bytes): Encoded source image.
+        parameters (Dict): `parameters` of the row, as built by `lazy_parameters`.
+        annotations (dict): {"bboxes": [...], "labels": [...]} of the source image.
+        pipeline (AugmentationPipeline, optional): Pipeline to reuse across calls.
+
+    Returns:
+        List[AugmentedSample]: In-memory samples, named like eagerly stored ones.
+    """
+    pipeline = pipeline or AugmentationPipeline(output_dir=LAZY_AUGMENTATION_DIR)
+    preprocess = parameters.get("preprocess")
+    return pipeline.apply_augmentations_policy(
+        image=pipeline.decode(image_bytes, preprocess),
+        annotations=annotations,
+        annotation_type="detection",
+        file_name_prefix=parameters["file_name_prefix"],
+        user_selected_augmentations=parameters["policy"],
+        multiplier=parameters["multiplier"],
+        seed=parameters["seed"],
+        preprocess_pipeline=preprocess,
+        in_memory=True,
+        spill_bytes=0,
+    )
+
+
+def submit_materialize(
+    engine: AugmentationEngine,
+    image_bytes: bytes,
+    parameters: Dict,
+    annotations: Dict,
+) -> Future:
+    """
+    Schedule `materialize` on an `AugmentationEngine`.
+
+    The image is decoded by the caller and augmented on the engine's pool;
+    the future resolves to the same samples `materialize` returns.
+    """
+    preprocess = parameters.get("preprocess")
+    return engine.submit(
+        engine.pipeline.decode(image_bytes, preprocess),
+        annotations=annotations,
+        annotation_type="detection",
+        file_name_prefix=parameters["file_name_prefix"],
+        user_selected_augmentations=parameters["policy"],
+        multiplier=parameters["multiplier"],
+        seed=parameters["seed"],
+        preprocess_settings=preprocess,
+        in_memory=True,
+        spill_bytes=0,
+    )
@@ -0,0 +1,154 @@
+import os
+import json
+import hashlib
+import threading
+import albumentations as A
+from albumentations import CoarseDropout
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+
+AUGMENTATION_PIPELINE_CACHE_SIZE = int(os.getenv("AUGMENTATION_PIPELINE_CACHE_SIZE", 32))
+
+AUGMENTATION_TRANSFORMS = {
+    "horizontal_flip": A.HorizontalFlip,
+    "vertical_flip": A.VerticalFlip,
+    "rotate": A.Affine,
+    "gaussian_blur": A.GaussianBlur,
+    "brightness": A.RandomBrightnessContrast,
+    "contrast": A.RandomBrightnessContrast,
+    "random_crop": A.RandomCrop,
+    "scale": A.RandomScale,
+    "shear": A.Affine,
+    "sharpen": A.Sharpen,
+    "color_jitter": A.ColorJitter,
+    "elastic_transform": A.ElasticTransform,
+    "grid_distortion": A.GridDistortion,
+    "optical_distortion": A.OpticalDistortion,
+    "motion_blur": A.MotionBlur,
+    "random_shadow": A.RandomShadow,
+    "random_sun_flare": A.RandomSunFlare,
+    "hue_saturation_value": A.HueSaturationValue,
+    "cutout": CoarseDropout,
+}
+
+PREPROCESSING_TRANSFORMS = {
+    "resize": A.Resize,
+}
+
+# Policy entries that configure how the policy is applied rather than adding a transform,
+# e.g. {"name": "dedup", "params": {"hasher": "dhash", "threshold": 4}}.
+POLICY_OPTIONS = ("dedup",)
+
+PARAMETER_CASTS = {
+    "float": float,
+    "int": lambda value: int(float(value)),
+    "bool": lambda value: str(value).strip().lower() in ("1", "true", "yes"),
+    "choice": str,
+}
+
+_local = threading.local()
+
+
+def policy_hash(policy: List[Dict]) -> str:
+    """
+    Return a stable hash of an augmentation policy.
+
+    Policies that only differ in dict key order or tuple/list spelling of
+    parameters hash the same.
+    """
+    return hashlib.sha1(json.dumps(policy, sort_keys=True, default=list).encode("utf-8")).hexdigest()
+
+
+def policy_from_dataset_augmentation(dataset_augmentation) -> List[Dict]:
+    """
+    Build a policy list from a `DatasetAugmentation` row.
+
+    Parameters start from each augmentation's assigned defaults and are
+    overridden by the dataset's custom values, cast to their parameter type.
+    """
+    custom_values = {
+        (value.augmentation_id, value.parameter_id): value.value
+        for value in dataset_augmentation.custom_parameters.all()
+    }
+
+    policy = []
+    for augmentation in dataset_augmentation.augmentations.filter(is_active=True).order_by("id").prefetch_related("assigned_parameters__parameter"):
+        params = {}
+        for assignment in augmentation.assigned_parameters.all():
+            parameter = assignment.parameter
+            value = custom_values.get((augmentation.id, parameter.id), assignment.default_value)
+            params[parameter.name] = PARAMETER_CASTS.get(parameter.parameter_type, str)(value)
+        policy.append({"name": augmentation.name, "params": params})
+    return policy
+
+
+def policy_option(policy: List[Dict], name: str) -> Optional[Dict]:
+    """Return the params of a policy option entry, or None if the policy does not set it."""
+    for aug in policy:
+        if aug["name"] == name:
+            return aug.get("params", {})
+    return None
+
+
+def build_transforms(policy: List[Dict], table: Dict = AUGMENTATION_TRANSFORMS) -> list:
+    """Instantiate the transforms of a policy from a name -> transform table."""
+    transforms = []
+    for aug in policy:
+        if aug["name"] in POLICY_OPTIONS:
+            continue
+        transform = table.get(aug["name"])
+        if transform is None:
+            raise ValueError(f"Unsupported augmentation: {aug['name']}")
+        transforms.append(transform(**aug["params"]))
+    return transforms
+
+
+def build_augmentation_pipeline(policy: List[Dict]) -> A.Compose:
+    return A.Compose(
+        build_transforms(policy), bbox_params=A.BboxParams(format="albumentations", label_fields=["category_ids"])
+    )
+
+
+def build_preprocessing_pipeline(policy: List[Dict]) -> A.Compose:
+    # Unknown preprocessing steps are ignored, as before.
+    return A.Compose(build_transforms([step for step in policy if step["name"] in PREPROCESSING_TRANSFORMS], PREPROCESSING_TRANSFORMS))
+
+
+def preprocess_target_size(policy: Optional[List[Dict]]) -> Optional[tuple]:
+    """Return the (width, height) a preprocessing policy resizes to, if any."""
+    for step in policy or []:
+        if step["name"] == "resize":
+            return (step["params"]["width"], step["params"]["height"])
+    return None
+
+
+def get_augmentation_pipeline(policy: Union[List[Dict], object]) -> A.Compose:
+    """
+    Return the compiled pipeline of a policy, building it only once.
+
+    Pipelines are cached per thread (a Compose holds its own random state and
+    is not shared between concurrent callers), keyed by `policy_hash`, and
+    evicted least recently used beyond AUGMENTATION_PIPELINE_CACHE_SIZE.
+
+    Args:
+        policy (Union[List[Dict], DatasetAugmentation]): List of {"name", "params"} dicts or a DatasetAugmentation row.
+
+    Returns:
+        A.Compose: Augmentation pipeline.
+    """
+    if not isinstance(policy, (list, tuple)):
+        policy = policy_from_dataset_augmentation(policy)
+
+    cache = getattr(_local, "pipelines", None)
+    if cache is None:
+        cache = _local.pipelines = OrderedDict()
+
+    key = policy_hash([aug for aug in policy if aug["name"] not in POLICY_OPTIONS])
+    pipeline = cache.get(key)
+    if pipeline is None:
+        pipeline = cache[key] = build_augmentation_pipeline(policy)
+        while len(cache) > AUGMENTATION_PIPELINE_CACHE_SIZE:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(key)
+    return pipeline
@@ -1,6 +1,7 @@
 import cv2
 import os
 import json
+from io import BytesIO
 from pathlib import Path
 import numpy as np
 from PIL import Image as PILImage
@@ -16,21 +17,34 @@ def save_image(output_dir, file_name_prefix, image, mask=None, quality:int=65):
         mask (numpy.ndarray, optional): Mask to save.
     """
     image_path = Path(output_dir) / f"{file_name_prefix}.jpg"
+    image_path.write_bytes(encode_image(image, quality=quality))
+
+    if mask is not None:
+        mask_path = Path(output_dir) / f"{file_name_prefix}_mask.png"
+        cv2.imwrite(str(mask_path), mask)
+
+    return str(image_path)
+
+
+def encode_image(image, quality:int=65) -> bytes:
+    """
+    Encode a BGR image as JPEG bytes, with the same settings as `save_image`.
+
+    Args:
+        image (numpy.ndarray): Image to encode.
+        quality (int): JPEG quality.
+    """
     image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
     pil_img = PILImage.fromarray(image_rgb)
 
+    buffer = BytesIO()
     pil_img.save(
-        str(image_path),
+        buffer,
         format="JPEG",
         quality=quality,
         optimize=True
     )
-
-    if mask is not None:
-        mask_path = Path(output_dir) / f"{file_name_prefix}_mask.png"
-        cv2.imwrite(str(mask_path), mask)
-
-    return str(image_path)
+    return buffer.getvalue()
 
 
 def save_annotations(output_dir, file_name_prefix, bboxes, labels, annotation_type="detection"):
@@ -55,8 +69,47 @@ def save_annotations(output_dir, file_name_prefix, bboxes, labels, annotation_ty
 
     return str(annotation_path)
 
-def decode_image(file_bytes):
-    """Convert file bytes into a cv2 image (BGR)"""
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def reduced_decode_flag(file_bytes, min_size=None):
+    """
+    Return the cv2 imread flag decoding the image as small as possible while
+    keeping it at least `min_size` (width, height).
+
+    JPEG decoders can skip most of the work at 1/2, 1/4 or 1/8 scale; other
+    formats and unknown sizes decode at full resolution.
+    """
+    if not min_size:
+        return cv2.IMREAD_COLOR
+
+    try:
+        with PILImage.open(BytesIO(file_bytes)) as img:  # header only
+            if img.format != "JPEG":
+                return cv2.IMREAD_COLOR
+            width, height = img.size
+    except Exception:
+        return cv2.IMREAD_COLOR
+
+    for factor, flag in REDUCED_DECODE_FLAGS:
+        if width // factor >= min_size[0] and height // factor >= min_size[1]:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def decode_image(file_bytes, min_size=None):
+    """
+    Convert file bytes into a cv2 image (BGR).
+
+    Args:
+        file_bytes (bytes): Encoded image.
+        min_size (tuple, optional): (width, height) the caller will resize to; large JPEGs
+            are then decoded at a reduced scale that still covers it.
+    """
     nparr = np.frombuffer(file_bytes, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    img = cv2.imdecode(nparr, reduced_decode_flag(file_bytes, min_size))
     return img
\ No newline at end of file
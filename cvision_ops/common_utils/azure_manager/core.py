@@ -11,7 +11,10 @@ from io import BytesIO
 import zipfile
 from projects.models import Version, VersionImage
 from annotations.models import Annotation
-from common_utils.data.annotation.core import format_annotation
+from common_utils.data.annotation.core import read_annotation
+from common_utils.export.loader import iter_version_export_rows
+from common_utils.export.archive import compress_type_for, EXPORT_ZIP_COMPRESSION
+from common_utils.augmentation.utils import decode_image
 
 class AzureManager:
     def __init__(self,):
@@ -24,20 +27,19 @@ class AzureManager:
         pass
 
     @classmethod
-    def download_image_from_azure(self, file_path: str) -> np.ndarray:
+    def download_image_from_azure(self, file_path: str, min_size=None) -> np.ndarray:
         """
         Download an image from Azure Storage.
 
         Args:
             file_path (str): Path to the image in Azure.
+            min_size (tuple, optional): (width, height) the image will be resized to; see `decode_image`.
 
         Returns:
             np.ndarray: Image as a NumPy array.
         """
         with default_storage.open(file_path, 'rb') as file:
-            data = file.read()
-            np_img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
-            return np_img
+            return decode_image(file.read(), min_size=min_size)
     
     @classmethod
     def upload_image_to_azure(self, local_file_path: str, azure_path: str):
@@ -53,28 +55,36 @@ class AzureManager:
             url = default_storage.save(azure_path, content)
             
         return url
+
+    @classmethod
+    def upload_bytes_to_azure(self, data: bytes, azure_path: str):
+        """
+        Upload in-memory image bytes to Azure Storage.
+
+        Args:
+            data (bytes): Encoded file content.
+            azure_path (str): Target path in Azure Storage.
+        """
+        return default_storage.save(azure_path, ContentFile(data))
     
-    def zip_dataset(self, images, version):
+    def zip_dataset(self, images, version, compression=EXPORT_ZIP_COMPRESSION):
         zip_buffer = BytesIO()
         zip_filename = f"versions/{version.project.name}.v{version.version_number}.zip"
-        pbar = tqdm(images, ncols=125)
+        rows = iter_version_export_rows(version, version_image_ids=images.values_list("id", flat=True))
+        pbar = tqdm(rows, total=images.count(), ncols=125)
         with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for image in pbar:
-                zip_prefix = f"{image.project_image.mode.mode}"
-                with default_storage.open(image.project_image.image.image_file.name, 'rb') as file:
+            for row in pbar:
+                zip_prefix = f"{row.mode}"
+                with default_storage.open(row.image_file, 'rb') as file:
                     image_bytes = file.read()
-                    zipf.writestr(f"{zip_prefix}/images/{image.project_image.image.image_name}.jpg", image_bytes)
+                    image_arcname = f"{zip_prefix}/images/{row.image_name}.jpg"
+                    zipf.writestr(image_arcname, image_bytes, compress_type=compress_type_for(image_arcname, compression))
                     
-                annotations = Annotation.objects.filter(project_image=image.project_image, is_active=True)
-                yolo_annotations = [format_annotation(ann, format="yolo") for ann in annotations]
-                zipf.writestr(f"{zip_prefix}/labels/{image.project_image.image.image_name}.txt", "".join(yolo_annotations))
+                yolo_annotations = [read_annotation(bbox=data, label=class_id, format="yolo") for class_id, data in row.annotations]
+                label_arcname = f"{zip_prefix}/labels/{row.image_name}.txt"
+                zipf.writestr(label_arcname, "".join(yolo_annotations), compress_type=compress_type_for(label_arcname, compression))
         
         zip_buffer.seek(0)
         zip_path = default_storage.save(zip_filename, ContentFile(zip_buffer.getvalue()))
         version.version_file = zip_path
         version.save(update_fields=["version_file"])
-        
-        
-                
-    
-    
\ No newline at end of file
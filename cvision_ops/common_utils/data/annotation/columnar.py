@@ -0,0 +1,188 @@
+import itertools
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+YOLO_LINE = "%d %.6f %.6f %.6f %.6f\n"
+VOC_OBJECT = "<object><name>%s</name><bndbox><xmin>%s</xmin><ymin>%s</ymin><xmax>%s</xmax><ymax>%s</ymax></bndbox></object>\n"
+FORMAT_CHUNK_SIZE = 100_000
+
+
+def to_columnar(annotations: Iterable[Sequence[Tuple[int, list]]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Convert per-image (class_id, [xmin, ymin, xmax, ymax]) lists into box arrays.
+
+    Args:
+        annotations (Iterable[Sequence[Tuple[int, list]]]): Annotations of each image, in image order.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: image index (N,), class id (N,) and xyxy boxes (N, 4).
+    """
+    image_index, class_id, xyxy = [], [], []
+    for i, boxes in enumerate(annotations):
+        for label, bbox in boxes:
+            image_index.append(i)
+            class_id.append(label)
+            xyxy.append(bbox)
+
+    return (
+        np.asarray(image_index, dtype=np.int64),
+        np.asarray(class_id, dtype=np.int64),
+        np.asarray(xyxy, dtype=np.float64).reshape(-1, 4),
+    )
+
+
+def _format_rows(template: str, rows: Iterable[tuple]) -> List[str]:
+    """Format rows with a single template per chunk instead of one call per row."""
+    lines = []
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, FORMAT_CHUNK_SIZE))
+        if not chunk:
+            break
+        lines.extend((template * len(chunk) % tuple(itertools.chain.from_iterable(chunk))).splitlines(keepends=True))
+    return lines
+
+
+def _group_by_image(lines: List[str], image_index: np.ndarray, num_images: int) -> List[str]:
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(image_index, minlength=num_images))]).tolist()
+    return ["".join(lines[offsets[i]:offsets[i + 1]]) for i in range(num_images)]
+
+
+def _pixel_boxes(image_index: np.ndarray, xyxy: np.ndarray, images: List[Dict]) -> np.ndarray:
+    """Scale normalized boxes to pixels; every image needs its size so the dataset uses a single unit."""
+    unsized = [image["file_name"] for image in images if not image.get("width") or not image.get("height")]
+    if unsized:
+        raise ValueError(f"Image size unknown for {len(unsized)} images, e.g. {unsized[0]}")
+    sizes = np.array([[image["width"], image["height"]] for image in images], dtype=np.float64).reshape(-1, 2)
+    return xyxy * np.tile(sizes[image_index], 2)
+
+
+def yolo_labels(image_index: np.ndarray, class_id: np.ndarray, xyxy: np.ndarray, num_images: int) -> List[str]:
+    """
+    Return the YOLO label file content of every image.
+
+    Args:
+        image_index (np.ndarray): Image index of each box.
+        class_id (np.ndarray): Class id of each box.
+        xyxy (np.ndarray): Normalized (xmin, ymin, xmax, ymax) boxes.
+        num_images (int): Number of images.
+
+    Returns:
+        List[str]: One label string per image, empty for images without boxes.
+    """
+    order = np.argsort(image_index, kind="stable")
+    image_index, class_id, xyxy = image_index[order], class_id[order], xyxy[order]
+
+    centers = (xyxy[:, :2] + xyxy[:, 2:]) / 2
+    wh = xyxy[:, 2:] - xyxy[:, :2]
+    table = np.column_stack([class_id, centers, wh]).tolist()
+    return _group_by_image(_format_rows(YOLO_LINE, table), image_index, num_images)
+
+
+def pascal_voc_objects(
+    image_index: np.ndarray,
+    class_id: np.ndarray,
+    xyxy: np.ndarray,
+    num_images: int,
+    class_names: Optional[Dict[int, str]] = None,
+) -> List[str]:
+    """
+    Return the Pascal VOC <object> elements of every image, with the boxes as given.
+
+    Matches `read_annotation(format="pascal")` applied to each box in turn.
+
+    Args:
+        image_index (np.ndarray): Image index of each box.
+        class_id (np.ndarray): Class id of each box.
+        xyxy (np.ndarray): (xmin, ymin, xmax, ymax) boxes.
+        num_images (int): Number of images.
+        class_names (Optional[Dict[int, str]]): Name written for each class id; the class id itself when omitted.
+
+    Returns:
+        List[str]: The object elements of each image, empty for images without boxes.
+    """
+    order = np.argsort(image_index, kind="stable")
+    image_index, class_id, xyxy = image_index[order], class_id[order], xyxy[order]
+
+    labels = class_id.tolist()
+    if class_names is not None:
+        labels = [class_names.get(c, str(c)) for c in labels]
+    rows = ((label, *box) for label, box in zip(labels, xyxy.tolist()))
+    return _group_by_image(_format_rows(VOC_OBJECT, rows), image_index, num_images)
+
+
+def pascal_voc_labels(
+    image_index: np.ndarray,
+    class_id: np.ndarray,
+    xyxy: np.ndarray,
+    images: List[Dict],
+    class_names: Dict[int, str],
+) -> List[str]:
+    """
+    Return the Pascal VOC XML document of every image.
+
+    Args:
+        image_index (np.ndarray): Image index of each box.
+        class_id (np.ndarray): Class id of each box.
+        xyxy (np.ndarray): Normalized (xmin, ymin, xmax, ymax) boxes.
+        images (List[Dict]): Image dicts with "file_name", "width" and "height".
+        class_names (Dict[int, str]): Class name of each class id.
+
+    Returns:
+        List[str]: One XML document per image.
+    """
+    pixels = np.rint(_pixel_boxes(image_index, xyxy, images)).astype(np.int64)
+    objects = pascal_voc_objects(image_index, class_id, pixels, len(images), class_names)
+    return [
+        f"<annotation><filename>{image['file_name']}</filename>"
+        f"<size><width>{image['width']}</width><height>{image['height']}</height><depth>3</depth></size>\n"
+        f"{image_objects}</annotation>\n"
+        for image, image_objects in zip(images, objects)
+    ]
+
+
+def coco_dataset(
+    image_index: np.ndarray,
+    class_id: np.ndarray,
+    xyxy: np.ndarray,
+    images: List[Dict],
+    class_names: Dict[int, str],
+) -> Dict:
+    """
+    Return a single COCO detection dataset for all images.
+
+    Args:
+        image_index (np.ndarray): Image index of each box.
+        class_id (np.ndarray): Class id of each box.
+        xyxy (np.ndarray): Normalized (xmin, ymin, xmax, ymax) boxes.
+        images (List[Dict]): Image dicts with "id", "file_name", "width" and "height".
+        class_names (Dict[int, str]): Class name of each class id.
+
+    Returns:
+        Dict: COCO dataset with "images", "annotations" and "categories".
+    """
+    pixels = _pixel_boxes(image_index, xyxy, images)
+    bbox = np.column_stack([pixels[:, :2], pixels[:, 2:] - pixels[:, :2]])
+    area = bbox[:, 2] * bbox[:, 3]
+    image_ids = [image["id"] for image in images]
+
+    annotations = [
+        {
+            "id": i + 1,
+            "image_id": image_ids[index],
+            "category_id": category,
+            "bbox": box,
+            "area": box_area,
+            "segmentation": [],
+            "iscrowd": 0,
+        }
+        for i, (index, category, box, box_area) in enumerate(
+            zip(image_index.tolist(), class_id.tolist(), np.round(bbox, 4).tolist(), np.round(area, 4).tolist())
+        )
+    ]
+
+    return {
+        "images": images,
+        "annotations": annotations,
+        "categories": [{"id": c, "name": name} for c, name in sorted(class_names.items())],
+    }
@@ -67,19 +67,20 @@ def format_annotation(annotation, format="yolo"):
         return f"{annotation.annotation_class.class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n"
 
     elif format == "coco":
-        # COCO format JSON
+        # COCO format JSON; data is [xmin, ymin, xmax, ymax], bbox is [x, y, width, height]
+        x_min, y_min, x_max, y_max = data
         return {
             "image_id": annotation.project_image.image.image_name,
             "category_id": annotation.annotation_class.class_id,
-            "bbox": data['bbox'],
-            "segmentation": data.get("segmentation", []),
-            "area": (data['bbox'][2] - data['bbox'][0]) * (data['bbox'][3] - data['bbox'][1]),
+            "bbox": [x_min, y_min, x_max - x_min, y_max - y_min],
+            "segmentation": [],
+            "area": (x_max - x_min) * (y_max - y_min),
             "iscrowd": 0
         }
 
     elif format == "pascal":
         # Pascal VOC XML format
-        return f"<object><name>{annotation.annotation_class.name}</name><bndbox><xmin>{data['bbox'][0]}</xmin><ymin>{data['bbox'][1]}</ymin><xmax>{data['bbox'][2]}</xmax><ymax>{data['bbox'][3]}</ymax></bndbox></object>\n"
+        return f"<object><name>{annotation.annotation_class.name}</name><bndbox><xmin>{data[0]}</xmin><ymin>{data[1]}</ymin><xmax>{data[2]}</xmax><ymax>{data[3]}</ymax></bndbox></object>\n"
 
     return ""
 
@@ -96,13 +97,14 @@ def read_annotation(bbox:list, label:int, image_name:str=None, format="yolo"):
         return f"{int(label)} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n"
 
     elif format == "coco":
-        # COCO format JSON
+        # COCO format JSON; bbox is [xmin, ymin, xmax, ymax], COCO expects [x, y, width, height]
+        x_min, y_min, x_max, y_max = bbox
         return {
             "image_id": image_name,
             "category_id": label,
-            "bbox": bbox,
-            "segmentation": bbox.get("segmentation", []),
-            "area": (bbox[2] - bbox[0]) * (bbox[3] - bbox[1]),
+            "bbox": [x_min, y_min, x_max - x_min, y_max - y_min],
+            "segmentation": [],
+            "area": (x_max - x_min) * (y_max - y_min),
             "iscrowd": 0
         }
 
@@ -0,0 +1,115 @@
+import io
+import os
+from typing import Optional, Tuple
+from PIL import Image as PILImage
+from common_utils.data.image.fingerprint import perceptual_hash
+
+IMAGE_COMPRESS_QUALITY = int(os.getenv("IMAGE_COMPRESS_QUALITY", 65))
+IMAGE_COMPRESS_OPTIMIZE = os.getenv("IMAGE_COMPRESS_OPTIMIZE", "true").lower() in ("1", "true", "yes")
+IMAGE_COMPRESS_PASSTHROUGH = os.getenv("IMAGE_COMPRESS_PASSTHROUGH", "true").lower() in ("1", "true", "yes")
+IMAGE_COMPRESS_MAX_SIZE = int(os.getenv("IMAGE_COMPRESS_MAX_SIZE", 0)) or None
+
+EXIF_ORIENTATION = 0x0112
+
+# libjpeg's base luminance table (Annex K of the JPEG standard), scaled by the encoder quality.
+STANDARD_LUMINANCE_TABLE = (
+    16, 11, 10, 16, 24, 40, 51, 61,
+    12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56,
+    14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77,
+    24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103, 99,
+)
+
+
+def estimate_jpeg_quality(image: PILImage.Image) -> Optional[int]:
+    """
+    Estimate the libjpeg quality a JPEG was encoded with from its luminance quantization table.
+
+    Returns None for non-JPEG images.
+    """
+    quantization = getattr(image, "quantization", None)
+    if image.format != "JPEG" or not quantization or 0 not in quantization:
+        return None
+
+    scale = 100.0 * sum(quantization[0]) / sum(STANDARD_LUMINANCE_TABLE)
+    if scale <= 0:
+        return 100
+    quality = 5000.0 / scale if scale > 100 else (200.0 - scale) / 2.0
+    return int(round(min(max(quality, 1.0), 100.0)))
+
+
+def can_pass_through(image: PILImage.Image, quality: int) -> bool:
+    """
+    Whether an upload can be stored as is instead of being re-encoded.
+
+    Only baseline-compatible RGB JPEGs already at or below the target quality
+    qualify; an EXIF rotation would be applied by decoders on the original but
+    is dropped by re-encoding, so rotated images are re-encoded too.
+    """
+    estimated = estimate_jpeg_quality(image)
+    if estimated is None or estimated > quality or image.mode != "RGB":
+        return False
+    return image.getexif().get(EXIF_ORIENTATION, 1) == 1
+
+
+def compress_image_bytes(
+    data: bytes,
+    quality: int = IMAGE_COMPRESS_QUALITY,
+    optimize: bool = IMAGE_COMPRESS_OPTIMIZE,
+    max_size: Optional[int] = IMAGE_COMPRESS_MAX_SIZE,
+    passthrough: bool = IMAGE_COMPRESS_PASSTHROUGH,
+) -> Tuple[bytes, Tuple[int, int]]:
+    """
+    Re-encode an uploaded image as JPEG.
+
+    Kept free of Django imports so it can run in worker processes.
+
+    Args:
+        data (bytes): Uploaded file content.
+        quality (int): JPEG quality.
+        optimize (bool): Compute optimal Huffman tables; smaller files, slower encoding.
+        max_size (Optional[int]): Longest side allowed for the stored image. JPEGs are
+            reduced by the decoder (draft mode, by a power of two), so the result may
+            remain somewhat larger than this.
+        passthrough (bool): Return `data` unchanged when it is a JPEG already at or
+            below `quality` and no downscaling is needed.
+
+    Returns:
+        Tuple[bytes, Tuple[int, int]]: Encoded JPEG and the (width, height) of the stored image.
+    """
+    image_file = PILImage.open(io.BytesIO(data))
+    img_size = image_file.size
+
+    needs_resize = bool(max_size) and max(img_size) > max_size
+    if passthrough and not needs_resize and can_pass_through(image_file, quality):
+        return data, img_size
+
+    if needs_resize and image_file.format == "JPEG":
+        scale = max_size / max(img_size)
+        image_file.draft("RGB", (int(img_size[0] * scale), int(img_size[1] * scale)))
+
+    if image_file.mode != "RGB":
+        image_file = image_file.convert("RGB")
+
+    compressed_io = io.BytesIO()
+    image_file.save(
+        compressed_io,
+        format="JPEG",
+        optimize=optimize,
+        quality=quality
+    )
+    return compressed_io.getvalue(), image_file.size
+
+
+def prepare_upload(data: bytes, perceptual: bool = False, **kwargs) -> Tuple[bytes, Tuple[int, int], Optional[int]]:
+    """
+    Compress an upload and, when asked, compute its perceptual hash in the same worker call.
+
+    Returns:
+        Tuple[bytes, Tuple[int, int], Optional[int]]: Encoded JPEG, its size and the perceptual hash (or None).
+    """
+    compressed, size = compress_image_bytes(data, **kwargs)
+    return compressed, size, perceptual_hash(data) if perceptual else None
@@ -15,30 +15,33 @@ from tenants.models import (
 from PIL import Image as PILImage
 from projects.models import Project, ProjectImage
 from django.core.files.base import ContentFile
-from common_utils.data.integrity import validate_image_exists
+from common_utils.data.integrity import find_existing_image
+from common_utils.data.image.compression import compress_image_bytes, prepare_upload
+from common_utils.data.image.fingerprint import content_hash
+from common_utils.data.image.dedup import perceptual_fields, find_near_duplicates, IMAGE_NEAR_DUPLICATE_DISTANCE
+from common_utils.projects.utils import invalidate_project_status_counts
 
 def compress_image(file, quality:int=65):
-    image_file = PILImage.open(file.file)
-    img_size = image_file.size
-    compressed_io = io.BytesIO()
-    image_file.convert("RGB").save(
-        compressed_io,
-        format="JPEG",
-        optimize=True,
-        quality=quality
-    )
+    return compress_image_bytes(file.file.read(), quality=quality)
 
-    compressed_io.seek(0)
-    return compressed_io.read(), img_size
+def register_image_into_db(file, image_id:str=None, source=None, meta_info:dict=None, project:Project=None):
+    """
+    Store an uploaded image and register it, unless it is already known.
 
-def register_image_into_db(file, image_id:str=None, source=None, meta_info:dict=None):
+    An image registered under the same name or with the same content is
+    returned instead. With IMAGE_NEAR_DUPLICATE_DISTANCE set and a `project`
+    given, so is a near-duplicate of an image of that project, as in
+    `ingest_images`.
+    """
     success = False
     result = ''
     try:
         file_ext = f".{file.filename.split('.')[-1]}"
         filename = file.filename.split(file_ext)[0]
-        if validate_image_exists(filename=filename):
-            image = Image.objects.filter(image_name=filename).first()
+        data = file.file.read()
+        digest = content_hash(data)
+        image = find_existing_image(filename=filename, content_hash=digest)
+        if image:
             result = {
                 'filename': file.filename,
                 'status': 'failed',
@@ -48,13 +51,27 @@ def register_image_into_db(file, image_id:str=None, source=None, meta_info:dict=
             
             return success, result, image
         
-        file_content, img_size = compress_image(file=file)
+        file_content, img_size, phash = prepare_upload(data, perceptual=IMAGE_NEAR_DUPLICATE_DISTANCE >= 0)
+        if phash is not None and project:
+            match = find_near_duplicates(project, [phash], max_distance=IMAGE_NEAR_DUPLICATE_DISTANCE)[0]
+            if match:
+                image = match[0]
+                result = {
+                    'filename': file.filename,
+                    'status': 'failed',
+                    'reason': 'Near-duplicate of an existing image',
+                    'image_id': image.image_id,
+                }
+                return success, result, image
+
         image = Image(
             image_name=filename,
             image_id=image_id if image_id else str(uuid.uuid4()),
             source_of_origin=source,
             meta_info=meta_info,
-            sensorbox=SensorBox.objects.filter(sensor_box_name=source).first()
+            sensorbox=SensorBox.objects.filter(sensor_box_name=source).first(),
+            content_hash=digest,
+            **perceptual_fields(phash),
         )
         
         image.width, image.height = img_size
@@ -89,11 +106,13 @@ def save_image_file(file_path:str, file:UploadFile):
 def save_image(file, image_id:str=None, project_id=None, source=None, meta_info:dict=None):
     success = False
     try:
+        project = Project.objects.filter(name=project_id).first() if project_id else None
         success, result, image = register_image_into_db(
             file=file,
             image_id=image_id,
             source=source,
             meta_info=meta_info,
+            project=project,
         ) 
 
         # if not success:
@@ -101,10 +120,6 @@ def save_image(file, image_id:str=None, project_id=None, source=None, meta_info:
 
         print(result)
         if project_id:
-            project = Project.objects.filter(
-                name=project_id
-            ).first()
-
             if not project:
                 result = {
                     'filename': file.filename,
@@ -114,10 +129,12 @@ def save_image(file, image_id:str=None, project_id=None, source=None, meta_info:
                 }
                 return success, result
             
-            ProjectImage.objects.get_or_create(
+            _, created = ProjectImage.objects.get_or_create(
                 project=project,
                 image=image
             )
+            if created:
+                invalidate_project_status_counts(project.id)
 
         result = {
             'filename': file.filename,
@@ -0,0 +1,99 @@
+import os
+import django
+django.setup()
+from functools import reduce
+from operator import or_
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.db.models import Q
+from images.models import Image
+from projects.models import Project
+from common_utils.data.image.fingerprint import (
+    hash_bands,
+    to_signed,
+    to_unsigned,
+    hamming_distance,
+    PERCEPTUAL_HASH_BANDS,
+)
+
+# Near-duplicate uploads within this many differing bits of an image of the same
+# project are linked to that image instead of being stored. Negative disables
+# perceptual hashing at ingest. Values above PERCEPTUAL_HASH_BANDS - 1 may miss matches.
+IMAGE_NEAR_DUPLICATE_DISTANCE = int(os.getenv("IMAGE_NEAR_DUPLICATE_DISTANCE", -1))
+
+BAND_FIELDS = [f"phash_band_{band}" for band in range(PERCEPTUAL_HASH_BANDS)]
+
+
+def perceptual_fields(value: Optional[int]) -> Dict:
+    """Model field values of a perceptual hash (all None when the hash is unknown)."""
+    if value is None:
+        return {"perceptual_hash": None, **{field: None for field in BAND_FIELDS}}
+    return {"perceptual_hash": to_signed(value), **dict(zip(BAND_FIELDS, hash_bands(value)))}
+
+
+def band_condition(values: Iterable[int]) -> Q:
+    """Images sharing at least one band with any of the given hashes."""
+    per_band = {field: set() for field in BAND_FIELDS}
+    for value in values:
+        for field, band in zip(BAND_FIELDS, hash_bands(value)):
+            per_band[field].add(band)
+    return reduce(or_, (Q(**{f"{field}__in": bands}) for field, bands in per_band.items() if bands))
+
+
+def find_near_duplicates(
+    project: Project,
+    values: List[int],
+    max_distance: int = max(IMAGE_NEAR_DUPLICATE_DISTANCE, 0),
+    exclude: Iterable[int] = (),
+) -> List[Optional[Tuple[Image, int]]]:
+    """
+    Look up the closest image of a project for each perceptual hash.
+
+    Candidates come from one indexed query on the hash bands; exact Hamming
+    distances are then checked in Python.
+
+    Args:
+        project (Project): Project whose images are searched.
+        values (List[int]): Unsigned perceptual hashes.
+        max_distance (int): Largest Hamming distance reported as a near-duplicate.
+        exclude (Iterable[int]): Image primary keys to leave out.
+
+    Returns:
+        List[Optional[Tuple[Image, int]]]: (image, distance) of the closest match per hash, or None.
+    """
+    if not values:
+        return []
+
+    candidates = list(
+        Image.objects
+        .filter(projects__project=project, perceptual_hash__isnull=False)
+        .filter(band_condition(values))
+        .exclude(pk__in=list(exclude))
+        .distinct()
+    )
+
+    matches = []
+    for value in values:
+        best = None
+        for image in candidates:
+            distance = hamming_distance(value, to_unsigned(image.perceptual_hash))
+            if distance <= max_distance and (best is None or distance < best[1]):
+                best = (image, distance)
+        matches.append(best)
+    return matches
+
+
+def list_near_duplicates(project: Project, image: Image, max_distance: int = PERCEPTUAL_HASH_BANDS - 1) -> List[Tuple[Image, int]]:
+    """All images of a project within `max_distance` bits of `image`, closest first."""
+    if image.perceptual_hash is None:
+        return []
+
+    value = to_unsigned(image.perceptual_hash)
+    candidates = (
+        Image.objects
+        .filter(projects__project=project, perceptual_hash__isnull=False)
+        .filter(band_condition([value]))
+        .exclude(pk=image.pk)
+        .distinct()
+    )
+    matches = [(candidate, hamming_distance(value, to_unsigned(candidate.perceptual_hash))) for candidate in candidates]
+    return sorted((match for match in matches if match[1] <= max_distance), key=lambda match: match[1])
@@ -0,0 +1,69 @@
+import io
+import hashlib
+from typing import BinaryIO, List
+from PIL import Image as PILImage
+
+PERCEPTUAL_HASH_SIZE = 8
+# A 64-bit hash split into 4 bands of 16 bits: two hashes at Hamming distance
+# below 4 always share at least one band exactly (pigeonhole), so indexed band
+# lookups find every near-duplicate up to that distance.
+PERCEPTUAL_HASH_BANDS = 4
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 of an uploaded file, as stored in `Image.content_hash`."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def copy_and_hash(source: BinaryIO, destination: BinaryIO, chunk_size: int = SPOOL_CHUNK_SIZE) -> str:
+    """Copy a file object chunk by chunk and return the content hash of what was copied."""
+    hasher = hashlib.sha256()
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        hasher.update(chunk)
+        destination.write(chunk)
+    return hasher.hexdigest()
+
+
+def perceptual_hash(data: bytes, hash_size: int = PERCEPTUAL_HASH_SIZE) -> int:
+    """
+    Difference hash of an encoded image: sign of the horizontal gradients of a
+    (hash_size+1, hash_size) grayscale thumbnail.
+
+    JPEGs are decoded in draft mode at a reduced scale, so this costs a few
+    milliseconds even for 4K frames.
+    """
+    image = PILImage.open(io.BytesIO(data))
+    image.draft("L", (hash_size * 8, hash_size * 8))
+    thumbnail = image.convert("L").resize((hash_size + 1, hash_size), PILImage.Resampling.BOX)
+    pixels = list(thumbnail.getdata())
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col + 1] > pixels[offset + col])
+    return value
+
+
+def hash_bands(value: int, bands: int = PERCEPTUAL_HASH_BANDS, bits: int = PERCEPTUAL_HASH_SIZE ** 2) -> List[int]:
+    """Split a perceptual hash into `bands` equal bit ranges, most significant first."""
+    width = bits // bands
+    mask = (1 << width) - 1
+    return [(value >> (bits - width * (band + 1))) & mask for band in range(bands)]
+
+
+def to_signed(value: int, bits: int = 64) -> int:
+    """Map an unsigned hash onto a signed integer column."""
+    return value - (1 << bits) if value >= 1 << (bits - 1) else value
+
+
+def to_unsigned(value: int, bits: int = 64) -> int:
+    return value + (1 << bits) if value < 0 else value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
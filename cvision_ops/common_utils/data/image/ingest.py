@@ -0,0 +1,420 @@
+import os
+import json
+import uuid
+import threading
+import multiprocessing
+import django
+django.setup()
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import BinaryIO, Dict, List, NamedTuple, Optional
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.core.files.base import ContentFile
+from images.models import Image, PendingImageUpload
+from tenants.models import SensorBox
+from projects.models import Project, ProjectImage
+from common_utils.data.image.compression import prepare_upload
+from common_utils.data.image.fingerprint import content_hash, copy_and_hash
+from common_utils.data.image.dedup import perceptual_fields, find_near_duplicates, IMAGE_NEAR_DUPLICATE_DISTANCE
+from common_utils.jobs.utils import assign_uploaded_images_to_batch
+from common_utils.projects.utils import invalidate_project_status_counts
+
+INGEST_PIPELINED = os.getenv("INGEST_PIPELINED", "false").lower() in ("1", "true", "yes")
+INGEST_COMPRESS_WORKERS = int(os.getenv("INGEST_COMPRESS_WORKERS", os.cpu_count() or 1))
+INGEST_STORAGE_CONCURRENCY = int(os.getenv("INGEST_STORAGE_CONCURRENCY", 8))
+INGEST_START_METHOD = os.getenv("INGEST_START_METHOD", "spawn")
+INGEST_DEFERRED = os.getenv("INGEST_DEFERRED", "false").lower() in ("1", "true", "yes")
+INGEST_SPOOL_DIR = os.getenv("INGEST_SPOOL_DIR", "/tmp/ingest_spool")
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 32))
+
+_compress_pool = None
+_compress_pool_lock = threading.Lock()
+
+
+def get_compress_pool() -> Optional[Executor]:
+    """
+    Return the pool shared by all requests of this worker, creating it on first use.
+
+    A daemonic process (e.g. a Celery prefork child) may not start children,
+    so it gets a thread pool instead; PIL releases the GIL while decoding and
+    encoding, so compression still runs in parallel there. Returns None
+    (compress inline) when pooling is disabled. A process pool broken by a
+    crashed worker is replaced.
+    """
+    global _compress_pool
+    if INGEST_COMPRESS_WORKERS <= 0:
+        return None
+
+    with _compress_pool_lock:
+        if _compress_pool is None or getattr(_compress_pool, "_broken", False):
+            if multiprocessing.current_process().daemon:
+                _compress_pool = ThreadPoolExecutor(max_workers=INGEST_COMPRESS_WORKERS, thread_name_prefix="compress")
+            else:
+                _compress_pool = ProcessPoolExecutor(
+                    max_workers=INGEST_COMPRESS_WORKERS,
+                    mp_context=multiprocessing.get_context(INGEST_START_METHOD),
+                )
+        return _compress_pool
+
+
+def split_filename(filename: str) -> str:
+    """Return the image name of an upload, as `register_image_into_db` derives it."""
+    file_ext = f".{filename.split('.')[-1]}"
+    return filename.split(file_ext)[0]
+
+
+def failure(filename: str, reason: str, image_id: Optional[str] = None) -> Dict:
+    result = {
+        'filename': filename,
+        'status': 'failed',
+        'reason': reason,
+    }
+    if image_id:
+        result['image_id'] = image_id
+    return result
+
+
+def ingest_images(
+    files,
+    project_id: Optional[str] = None,
+    source: Optional[str] = None,
+    meta_info: Optional[dict] = None,
+    batch_id: Optional[str] = None,
+    image_ids: Optional[List[Optional[str]]] = None,
+    content_hashes: Optional[List[Optional[str]]] = None,
+) -> List[Dict]:
+    """
+    Register a batch of uploaded images, pipelining the expensive steps.
+
+    Behaves like calling `save_image` and `assign_uploaded_image_to_batch` for
+    every file, but:
+      - existing images are looked up with one query, by name and by content hash,
+      - with IMAGE_NEAR_DUPLICATE_DISTANCE set, near-duplicates of an image of
+        the project are linked to it instead of being stored,
+      - new images are compressed on a shared pool (see `get_compress_pool`),
+      - compressed files are written to storage concurrently,
+      - Image, ProjectImage and JobImage rows are inserted in bulk at the end.
+
+    Args:
+        files (list[UploadFile]): Uploaded files.
+        project_id (Optional[str]): Name of the project to add the images to.
+        source (Optional[str]): Source of origin (sensor box name).
+        meta_info (Optional[dict]): Meta info stored on every new image.
+        batch_id (Optional[str]): Upload batch; images of a batch go to the same job.
+        image_ids (Optional[List[Optional[str]]]): Image id to give each new image, aligned with `files`.
+        content_hashes (Optional[List[Optional[str]]]): Content hashes already computed while spooling, aligned with `files`.
+
+    Returns:
+        List[Dict]: One result dict per file, in upload order, as returned by `save_image`.
+    """
+    results: List[Optional[Dict]] = [None] * len(files)
+    names = [split_filename(file.filename) for file in files]
+    images: Dict[str, Image] = Image.objects.in_bulk(set(names), field_name="image_name")
+
+    # The first upload of each new name is registered; later ones reuse it.
+    new_indexes, seen = [], set(images)
+    for i, name in enumerate(names):
+        if name not in seen:
+            seen.add(name)
+            new_indexes.append(i)
+
+    contents = {i: files[i].file.read() for i in new_indexes}
+    digests = {
+        i: content_hashes[i] if content_hashes and content_hashes[i] else content_hash(contents[i])
+        for i in new_indexes
+    }
+
+    # Same content under another name: link the registered image, or the
+    # first upload of this request with that content.
+    by_hash = {
+        image.content_hash: image
+        for image in Image.objects.filter(content_hash__in=set(digests.values()))
+    }
+    aliases: Dict[int, int] = {}
+    first_by_hash: Dict[str, int] = {}
+    for i in new_indexes:
+        if digests[i] in by_hash:
+            images[names[i]] = by_hash[digests[i]]
+        elif digests[i] in first_by_hash:
+            aliases[i] = first_by_hash[digests[i]]
+        else:
+            first_by_hash[digests[i]] = i
+    new_indexes = list(first_by_hash.values())
+
+    project = Project.objects.filter(name=project_id).first() if project_id else None
+    perceptual = IMAGE_NEAR_DUPLICATE_DISTANCE >= 0
+    pool = get_compress_pool()
+    compressed = {}
+    if pool:
+        futures = {i: pool.submit(prepare_upload, contents[i], perceptual) for i in new_indexes}
+    else:
+        futures = None
+
+    for i in new_indexes:
+        try:
+            compressed[i] = futures[i].result() if futures else prepare_upload(contents[i], perceptual)
+        except Exception as err:
+            results[i] = failure(files[i].filename, f"failed to register image into db: {err}")
+    del contents
+
+    if perceptual and project and compressed:
+        indexes = list(compressed)
+        matches = find_near_duplicates(project, [compressed[i][2] for i in indexes], max_distance=IMAGE_NEAR_DUPLICATE_DISTANCE)
+        for i, match in zip(indexes, matches):
+            if match:
+                images[names[i]] = match[0]
+                del compressed[i]
+
+    field = Image._meta.get_field("image_file")
+
+    def store(i):
+        return field.storage.save(field.generate_filename(None, os.path.basename(files[i].filename)), ContentFile(compressed[i][0]))
+
+    stored = {}
+    with ThreadPoolExecutor(max_workers=INGEST_STORAGE_CONCURRENCY) as executor:
+        storage_futures = {i: executor.submit(store, i) for i in compressed}
+        for i, future in storage_futures.items():
+            try:
+                stored[i] = future.result()
+            except Exception as err:
+                results[i] = failure(files[i].filename, f"failed to register image into db: {err}")
+
+    sensorbox = SensorBox.objects.filter(sensor_box_name=source).first()
+    new_images = {}
+    for i, image_file in stored.items():
+        width, height = compressed[i][1]
+        new_images[i] = Image(
+            image_name=names[i],
+            image_id=image_ids[i] if image_ids and image_ids[i] else str(uuid.uuid4()),
+            source_of_origin=source,
+            meta_info=meta_info,
+            sensorbox=sensorbox,
+            image_file=image_file,
+            width=width,
+            height=height,
+            content_hash=digests[i],
+            **perceptual_fields(compressed[i][2]),
+        )
+
+    try:
+        with transaction.atomic():
+            Image.objects.bulk_create(list(new_images.values()))
+    except IntegrityError:
+        # A concurrent upload registered some of these names; fall back to row by row.
+        for i, image in list(new_images.items()):
+            try:
+                with transaction.atomic():
+                    image.save()
+            except IntegrityError as err:
+                del new_images[i]
+                existing = Image.objects.filter(image_name=names[i]).first()
+                if existing:
+                    images[names[i]] = existing
+                else:
+                    results[i] = failure(files[i].filename, f"failed to register image into db: {err}")
+
+    for i, image in new_images.items():
+        images[names[i]] = image
+    for i, first in aliases.items():
+        if names[first] in images:
+            images[names[i]] = images[names[first]]
+
+    for i, name in enumerate(names):
+        if results[i] is not None:
+            continue
+        image = images.get(name)
+        if image is None:
+            results[i] = failure(files[i].filename, "failed to register image into db")
+        elif project_id and not project:
+            results[i] = failure(files[i].filename, f"Project {project_id} not found", image_id=image.image_id)
+        else:
+            results[i] = {
+                'filename': files[i].filename,
+                'status': 'success',
+                'image_id': image.image_id,
+            }
+
+    if project:
+        registered = {images[names[i]].pk for i, result in enumerate(results) if result['status'] == 'success'}
+        existing = set(
+            ProjectImage.objects.filter(project=project, image_id__in=registered).values_list("image_id", flat=True)
+        )
+        ProjectImage.objects.bulk_create(
+            [ProjectImage(project=project, image_id=image_pk) for image_pk in registered - existing],
+            ignore_conflicts=True,
+        )
+        invalidate_project_status_counts(project.id)
+        project_images = list(
+            ProjectImage.objects.filter(project=project, image_id__in=registered).select_related("project").order_by("id")
+        )
+        try:
+            assign_uploaded_images_to_batch(project_images, batch_id)
+        except Exception as err:
+            for i, result in enumerate(results):
+                if result['status'] == 'success':
+                    results[i] = failure(files[i].filename, str(err))
+
+    return results
+
+
+class SpooledFile(NamedTuple):
+    filename: str
+    file: BinaryIO
+
+
+def spool_uploads(
+    files,
+    project_id: Optional[str] = None,
+    source: Optional[str] = None,
+    meta_info: Optional[dict] = None,
+    batch_id: Optional[str] = None,
+) -> List[PendingImageUpload]:
+    """
+    Write uploaded files to the spool directory and record them as pending.
+
+    Content hashes are computed while copying. Image ids are reserved up
+    front so the caller can answer right away: uploads matching a registered
+    image by name or content get its id, repeated names or content within the
+    request share the id of their first upload.
+
+    Args:
+        files (list[UploadFile]): Uploaded files.
+        project_id (Optional[str]): Name of the project to add the images to.
+        source (Optional[str]): Source of origin (sensor box name).
+        meta_info (Optional[dict]): Meta info stored on every new image.
+        batch_id (Optional[str]): Upload batch; images of a batch go to the same job.
+
+    Returns:
+        List[PendingImageUpload]: One pending row per file, in upload order.
+    """
+    os.makedirs(INGEST_SPOOL_DIR, exist_ok=True)
+    names = [split_filename(file.filename) for file in files]
+
+    pending = []
+    try:
+        for file in files:
+            upload_id = str(uuid.uuid4())
+            spool_path = os.path.join(INGEST_SPOOL_DIR, f"{upload_id}{os.path.splitext(file.filename)[1]}")
+            with open(spool_path, "wb") as buffer:
+                digest = copy_and_hash(file.file, buffer)
+
+            pending.append(
+                PendingImageUpload(
+                    upload_id=upload_id,
+                    filename=file.filename,
+                    spool_path=spool_path,
+                    content_hash=digest,
+                    project_name=project_id,
+                    source_of_origin=source,
+                    meta_info=meta_info,
+                    batch_id=batch_id,
+                )
+            )
+
+        by_name, by_hash = {}, {}
+        hashes = {row.content_hash for row in pending}
+        for image_name, digest, image_id in Image.objects.filter(
+            Q(image_name__in=set(names)) | Q(content_hash__in=hashes)
+        ).values_list("image_name", "content_hash", "image_id"):
+            by_name[image_name] = image_id
+            if digest:
+                by_hash.setdefault(digest, image_id)
+
+        for row, name in zip(pending, names):
+            row.image_id = by_name.get(name) or by_hash.get(row.content_hash) or str(uuid.uuid4())
+            by_name.setdefault(name, row.image_id)
+            by_hash.setdefault(row.content_hash, row.image_id)
+
+        return PendingImageUpload.objects.bulk_create(pending)
+    except Exception:
+        for row in pending:
+            if os.path.exists(row.spool_path):
+                os.remove(row.spool_path)
+        raise
+
+
+def claim_pending_uploads(upload_ids: Optional[List[str]] = None, limit: int = INGEST_BATCH_SIZE) -> List[PendingImageUpload]:
+    """
+    Mark pending rows as processing and return them.
+
+    Args:
+        upload_ids (Optional[List[str]]): Rows to claim; the oldest pending rows when None.
+        limit (int): Maximum number of rows claimed when `upload_ids` is None.
+    """
+    queryset = PendingImageUpload.objects.filter(status="pending")
+    if upload_ids is not None:
+        queryset = queryset.filter(upload_id__in=upload_ids)
+    else:
+        queryset = queryset.order_by("created_at")[:limit]
+
+    ids = list(queryset.values_list("id", flat=True))
+    # Rows claimed meanwhile by another worker are no longer pending and are skipped.
+    with transaction.atomic():
+        rows = list(PendingImageUpload.objects.select_for_update().filter(id__in=ids, status="pending").order_by("id"))
+        PendingImageUpload.objects.filter(id__in=[row.id for row in rows]).update(status="processing")
+    return rows
+
+
+def process_pending_uploads(rows: List[PendingImageUpload], batch_size: int = INGEST_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Ingest claimed pending uploads with `ingest_images`, one batch at a time.
+
+    Rows are grouped by request parameters (project, source, meta info and
+    batch). Spooled files of successful rows are removed; failed rows keep
+    theirs and record the reason. If a batch raises, its rows go back to
+    pending before the error propagates, so a retry picks them up again.
+
+    Returns:
+        Dict[str, int]: Number of rows per final status.
+    """
+    groups: Dict[tuple, List[PendingImageUpload]] = {}
+    for row in rows:
+        key = (row.project_name, row.source_of_origin, row.batch_id, json.dumps(row.meta_info, sort_keys=True))
+        groups.setdefault(key, []).append(row)
+
+    counts = {"done": 0, "failed": 0}
+    for group in groups.values():
+        for start in range(0, len(group), batch_size):
+            batch = group[start:start + batch_size]
+            files = []
+            try:
+                for row in batch:
+                    try:
+                        files.append(SpooledFile(filename=row.filename, file=open(row.spool_path, "rb")))
+                    except OSError as err:
+                        row.status, row.reason = "failed", f"spooled file is missing: {err}"
+
+                readable = [row for row in batch if row.status != "failed"]
+                results = ingest_images(
+                    files=files,
+                    project_id=batch[0].project_name,
+                    source=batch[0].source_of_origin,
+                    meta_info=batch[0].meta_info,
+                    batch_id=batch[0].batch_id,
+                    image_ids=[row.image_id for row in readable],
+                    content_hashes=[row.content_hash for row in readable],
+                ) if files else []
+            except Exception:
+                PendingImageUpload.objects.filter(id__in=[row.id for row in batch]).update(status="pending")
+                raise
+            finally:
+                for file in files:
+                    file.file.close()
+
+            for row, result in zip(readable, results):
+                row.status = "done" if result["status"] == "success" else "failed"
+                row.reason = result.get("reason")
+                row.image_id = result.get("image_id", row.image_id)
+
+            now = timezone.now()
+            for row in batch:
+                row.updated_at = now
+
+            PendingImageUpload.objects.bulk_update(batch, ["status", "reason", "image_id", "updated_at"])
+            for row in batch:
+                counts[row.status] += 1
+                if row.status == "done" and os.path.exists(row.spool_path):
+                    os.remove(row.spool_path)
+
+    return counts
@@ -1,11 +1,34 @@
 
 import django
 django.setup()
+from typing import Optional
 from django.conf import settings
+from django.db.models import Case, IntegerField, Q, Value, When
 from images.models import Image
 
-def validate_image_exists(filename):
-    if Image.objects.filter(image_name=filename).exists(): 
+def find_existing_image(filename:str=None, content_hash:str=None) -> Optional[Image]:
+    """
+    Return the image already registered under this name or with this content, if any.
+
+    Both lookups are indexed and answered by a single query. `image_name` is
+    unique but `content_hash` is not, so a name match wins and otherwise the
+    oldest image with the same content is returned.
+    """
+    condition = Q()
+    if filename:
+        condition |= Q(image_name=filename)
+    if content_hash:
+        condition |= Q(content_hash=content_hash)
+    if not condition:
+        return None
+
+    ordering = ["created_at", "id"]
+    if filename:
+        ordering.insert(0, Case(When(image_name=filename, then=Value(0)), default=Value(1), output_field=IntegerField()))
+    return Image.objects.filter(condition).order_by(*ordering).first()
+
+def validate_image_exists(filename, content_hash:str=None):
+    if find_existing_image(filename=filename, content_hash=content_hash):
         return True
         
     return False
@@ -0,0 +1,143 @@
+import os
+import zipfile
+import zipstream
+from collections import namedtuple
+from typing import Callable, Iterable, Optional, Tuple
+
+EXPORT_ZIP_COMPRESSION = os.getenv("EXPORT_ZIP_COMPRESSION", "auto")
+COMPRESSION_POLICIES = ("auto", "deflate", "store")
+STORED_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+# Yielded between entries by a `write_entries` source to mark a resumable point.
+EntryBoundary = namedtuple("EntryBoundary", ["marker"])
+
+
+def compress_type_for(arcname: str, policy: str = EXPORT_ZIP_COMPRESSION) -> int:
+    """
+    Return the zip compression method for an archive entry.
+
+    Args:
+        arcname (str): Name of the entry in the archive.
+        policy (str): "auto" stores already-compressed image payloads and deflates
+            everything else (labels, data.yaml); "deflate" and "store" apply to all entries.
+
+    Returns:
+        int: zipfile.ZIP_STORED or zipfile.ZIP_DEFLATED.
+    """
+    if policy not in COMPRESSION_POLICIES:
+        raise ValueError(f"Unsupported compression policy: {policy}")
+
+    if policy == "store":
+        return zipfile.ZIP_STORED
+    if policy == "deflate":
+        return zipfile.ZIP_DEFLATED
+    return zipfile.ZIP_STORED if arcname.lower().endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+
+
+def zinfo_record(zinfo: zipfile.ZipInfo) -> list:
+    """Return the compact, JSON serializable central-directory record of a written entry."""
+    return [
+        zinfo.filename,
+        list(zinfo.date_time),
+        zinfo.compress_type,
+        zinfo.flag_bits,
+        zinfo.CRC,
+        zinfo.compress_size,
+        zinfo.file_size,
+        zinfo.header_offset,
+        zinfo.external_attr,
+        zinfo.extract_version,
+        zinfo.create_version,
+    ]
+
+
+def zinfo_from_record(record: list) -> zipstream.ZipInfo:
+    """Rebuild the entry described by a `zinfo_record` record."""
+    filename, date_time, *fields = record
+    zinfo = zipstream.ZipInfo(filename, tuple(date_time))
+    (
+        zinfo.compress_type,
+        zinfo.flag_bits,
+        zinfo.CRC,
+        zinfo.compress_size,
+        zinfo.file_size,
+        zinfo.header_offset,
+        zinfo.external_attr,
+        zinfo.extract_version,
+        zinfo.create_version,
+    ) = fields
+    return zinfo
+
+
+class LazyZipFile(zipstream.ZipFile):
+    """
+    zipstream.ZipFile that also accepts generators of entries.
+
+    Sources registered with `write_entries` are only consumed once the archive
+    iteration reaches them, so a source can block on I/O (e.g. prefetched blobs)
+    and skip entries it discovers to be missing without the whole archive being
+    planned up front. When `compression_policy` is set, entries written without
+    an explicit compress_type get one from `compress_type_for`.
+
+    A source may also yield `EntryBoundary` markers; when the iteration reaches
+    one, every byte of the preceding entries has been handed to the consumer and
+    `on_boundary(marker, zip_state)` is called. The state only carries the
+    records of the entries written since the previous boundary; passing the
+    offset of a boundary together with all records up to it to `restore`
+    continues the archive from the same byte offset.
+    """
+
+    def __init__(self, *args, compression_policy: Optional[str] = None, on_boundary: Optional[Callable] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compression_policy = compression_policy
+        self.on_boundary = on_boundary
+        self._reported = 0
+
+    def zip_state(self) -> dict:
+        """Return the archive offset and the records of the entries added since the previous call."""
+        records = [zinfo_record(zinfo) for zinfo in self.filelist[self._reported:]]
+        self._reported = len(self.filelist)
+        return {"offset": self.fp.tell(), "records": records}
+
+    def restore(self, zip_state: dict):
+        """Continue an archive whose first `zip_state['offset']` bytes, holding the entries in `zip_state['records']`, were already emitted."""
+        self.fp.data_pointer = zip_state["offset"]
+        self.filelist = [zinfo_from_record(record) for record in zip_state["records"]]
+        self.NameToInfo = {zinfo.filename: zinfo for zinfo in self.filelist}
+        self._reported = len(self.filelist)
+        self._didModify = True
+
+    def resolve_compress_type(self, arcname: str, compress_type: Optional[int] = None) -> Optional[int]:
+        if compress_type is None and self.compression_policy:
+            return compress_type_for(arcname, self.compression_policy)
+        return compress_type
+
+    def write_iter(self, arcname, iterable, compress_type=None):
+        return super().write_iter(arcname, iterable, compress_type=self.resolve_compress_type(arcname, compress_type))
+
+    def write_entries(self, entries: Iterable[Tuple[str, Iterable[bytes], Optional[int]]]):
+        """Register an iterable of (arcname, bytes iterable, compress_type) tuples."""
+        self.paths_to_write.append({"entries": entries})
+
+    def __iter__(self):
+        self.paths_to_write = self._expand(self.paths_to_write)
+        return super().__iter__()
+
+    def _expand(self, queued):
+        for kwargs in queued:
+            if "entries" not in kwargs:
+                yield kwargs
+                continue
+
+            for entry in kwargs["entries"]:
+                if isinstance(entry, EntryBoundary):
+                    if self.on_boundary:
+                        self.on_boundary(entry.marker, self.zip_state())
+                    continue
+
+                arcname, iterable, compress_type = entry
+                yield {
+                    "arcname": arcname,
+                    "iterable": iterable,
+                    "compress_type": self.resolve_compress_type(arcname, compress_type),
+                }
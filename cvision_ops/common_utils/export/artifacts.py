@@ -0,0 +1,172 @@
+import os
+import json
+import uuid
+import pickle
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+EXPORT_ARTIFACT_DIR = os.getenv("EXPORT_ARTIFACT_DIR", "/var/tmp/export_artifacts")
+EXPORT_ARTIFACT_MAX_BYTES = int(os.getenv("EXPORT_ARTIFACT_MAX_BYTES", 4 * 1024 * 1024 * 1024))
+# Eviction removes the least recently used payloads until the store is back under this share of its size.
+EXPORT_ARTIFACT_EVICT_RATIO = 0.9
+
+
+def hash_image(image_id: str, image_file: str) -> str:
+    """
+    Return a stable identity hash for a stored image.
+
+    Uploaded images are immutable once written to storage, so the image id
+    together with the storage path identifies the payload.
+
+    Args:
+        image_id (str): Image id.
+        image_file (str): Storage path of the image file.
+
+    Returns:
+        str: SHA1 hex digest identifying the image payload.
+    """
+    return hashlib.sha1(f"{image_id}:{image_file}".encode("utf-8")).hexdigest()
+
+
+def hash_annotation_set(annotations: Iterable[Tuple[int, list]]) -> str:
+    """
+    Return an order independent hash over a set of (class_id, bbox) pairs.
+
+    Args:
+        annotations (Iterable[Tuple[int, list]]): Class ids and box coordinates.
+
+    Returns:
+        str: SHA1 hex digest of the annotation set.
+    """
+    rows = sorted(json.dumps([int(class_id), data], separators=(",", ":")) for class_id, data in annotations)
+    return hashlib.sha1("\n".join(rows).encode("utf-8")).hexdigest()
+
+
+def artifact_key(*parts: str) -> str:
+    """Return the store key of an artifact identified by `parts` (hashes, kind, format)."""
+    return hashlib.sha1(":".join(parts).encode("utf-8")).hexdigest()
+
+
+class ArtifactStore:
+    """
+    Content-addressed, size-bounded disk store for export payloads.
+
+    Holds what is expensive to produce again: source image payloads (a storage
+    download each) and lazily materialized augmentation samples (a decode,
+    augment and encode each). Keys are built with `artifact_key` from the
+    identity of the inputs, so a payload built for one version or format is
+    reused by every later export that shares the same image, annotations and
+    policy.
+
+    Payloads are files under `root`, written atomically; the store is shared by
+    concurrent exports and kept separate from the Django cache. Once its size
+    goes over `max_bytes`, the least recently used payloads are evicted.
+    `max_bytes=0` disables the store.
+    """
+
+    def __init__(self, root: str = EXPORT_ARTIFACT_DIR, max_bytes: int = EXPORT_ARTIFACT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f".{key}.{uuid.uuid4().hex}")
+        partial.write_bytes(data)
+        with self._lock:
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(partial, path)
+
+            if self._size is None:
+                self._size = self.usage()
+            else:
+                self._size += len(data) - replaced
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def get_object(self, key: str) -> Optional[Any]:
+        """Return the object stored with `put_object`; only this store's own payloads are ever unpickled."""
+        data = self.get(key)
+        return pickle.loads(data) if data is not None else None
+
+    def put_object(self, key: str, value: Any):
+        self.put(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def get_or_build(self, key: str, builder: Callable[[], Any]) -> Any:
+        """Return the stored object for `key`, building and storing it on a miss."""
+        value = self.get_object(key)
+        if value is None:
+            value = builder()
+            self.put_object(key, value)
+        return value
+
+    def _files(self):
+        if not self.root.exists():
+            return
+        for directory in self.root.iterdir():
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory):
+                if entry.is_file() and not entry.name.startswith("."):
+                    try:
+                        yield entry.path, entry.stat()
+                    except FileNotFoundError:
+                        continue
+
+    def usage(self) -> int:
+        """Return the bytes currently held by the store."""
+        return sum(stat.st_size for _, stat in self._files())
+
+    def evict(self):
+        """Remove the least recently used payloads until the store is under its eviction target."""
+        files = sorted(self._files(), key=lambda item: item[1].st_mtime)
+        size = sum(stat.st_size for _, stat in files)
+        target = self.max_bytes * EXPORT_ARTIFACT_EVICT_RATIO
+        for path, stat in files:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= stat.st_size
+
+        with self._lock:
+            self._size = size
@@ -0,0 +1,90 @@
+import os
+from datetime import timedelta
+from typing import Optional
+from django.db import transaction
+from django.utils import timezone
+from projects.models import VersionExportCheckpoint, VersionExportCheckpointSegment
+
+EXPORT_CHECKPOINT_TIMEOUT = int(os.getenv("EXPORT_CHECKPOINT_TIMEOUT", 60 * 60 * 24 * 6))
+# Exports with more archive entries than this are not checkpointed past it.
+EXPORT_CHECKPOINT_MAX_ENTRIES = int(os.getenv("EXPORT_CHECKPOINT_MAX_ENTRIES", 1_000_000))
+
+
+class ExportCheckpointStore:
+    """
+    Persists the progress of a block-staged export so a failed run can resume.
+
+    A checkpoint holds the marker of the last fully written version image, the
+    archive offset at that point, the number of blocks that cover the archive up
+    to it and the central-directory records of the entries written so far. It is
+    kept in the database as a `VersionExportCheckpoint` row; every save appends
+    only the records added since the previous save, and checkpoints stop
+    advancing once the archive holds more than `max_entries` entries.
+
+    Uncommitted Azure blocks are kept for 7 days, so checkpoints expire slightly
+    earlier by default.
+    """
+
+    def __init__(self, key: str, timeout: int = EXPORT_CHECKPOINT_TIMEOUT, max_entries: int = EXPORT_CHECKPOINT_MAX_ENTRIES):
+        self.key = key
+        self.timeout = timeout
+        self.max_entries = max_entries
+
+    def load(self) -> Optional[dict]:
+        """Return the saved checkpoint as {"marker", "block_count", "zip_state": {"offset", "records"}}, if any."""
+        checkpoint = VersionExportCheckpoint.objects.filter(key=self.key).first()
+        if checkpoint is None:
+            return None
+
+        if checkpoint.updated_at < timezone.now() - timedelta(seconds=self.timeout):
+            self.clear()
+            return None
+
+        records = [
+            record
+            for segment in checkpoint.segments.values_list("records", flat=True).iterator()
+            for record in segment
+        ]
+        if len(records) != checkpoint.entry_count:
+            self.clear()
+            return None
+
+        return {
+            "marker": checkpoint.marker,
+            "block_count": checkpoint.block_count,
+            "zip_state": {"offset": checkpoint.offset, "records": records},
+        }
+
+    def save(self, marker: int, offset: int, block_count: int, records: list) -> bool:
+        """
+        Advance the checkpoint.
+
+        Args:
+            marker (int): Last fully written version image id.
+            offset (int): Archive bytes written up to the marker.
+            block_count (int): Blocks covering those bytes.
+            records (list): Central-directory records of the entries written since the previous save.
+
+        Returns:
+            bool: False if the checkpoint was not advanced because the archive outgrew `max_entries`.
+        """
+        with transaction.atomic():
+            checkpoint = VersionExportCheckpoint.objects.select_for_update().filter(key=self.key).first()
+            entry_count = (checkpoint.entry_count if checkpoint else 0) + len(records)
+            if entry_count > self.max_entries:
+                return False
+
+            if checkpoint is None:
+                checkpoint = VersionExportCheckpoint(key=self.key)
+            checkpoint.marker = marker
+            checkpoint.offset = offset
+            checkpoint.block_count = block_count
+            checkpoint.entry_count = entry_count
+            checkpoint.save()
+
+            if records:
+                VersionExportCheckpointSegment.objects.create(checkpoint=checkpoint, records=records)
+        return True
+
+    def clear(self):
+        VersionExportCheckpoint.objects.filter(key=self.key).delete()
@@ -0,0 +1,525 @@
+import io
+import os
+import json
+import yaml
+import zipstream
+from io import StringIO
+from itertools import islice
+from contextlib import nullcontext
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+from PIL import Image as PILImage
+from django.core.files.storage import default_storage
+from projects.models import Version
+from annotations.models import AnnotationGroup
+from common_utils.data.annotation.core import read_annotation
+from common_utils.data.annotation.columnar import to_columnar, coco_dataset, yolo_labels, pascal_voc_objects
+from common_utils.progress.core import track_progress
+from common_utils.export.artifacts import ArtifactStore, artifact_key, hash_image, hash_annotation_set
+from common_utils.export.loader import iter_version_export_rows, count_version_images, EXPORT_CHUNK_SIZE
+from common_utils.export.archive import LazyZipFile, EntryBoundary, EXPORT_ZIP_COMPRESSION
+from common_utils.export.checkpoint import ExportCheckpointStore
+from common_utils.export.locks import ExportLock
+from common_utils.export.fetch import BlobFetcher
+from common_utils.export.uploader import BlockUploader
+from common_utils.augmentation.core import AugmentationPipeline
+from common_utils.augmentation.engine import AugmentationEngine
+from common_utils.augmentation.lazy import materialize, submit_materialize, LAZY_AUGMENTATION_DIR
+from common_utils.augmentation.registry import policy_hash
+
+# Source images whose lazy augmentations may run ahead of the zip writer; 0 sizes it from the engine's workers.
+EXPORT_LAZY_WINDOW = int(os.getenv("EXPORT_LAZY_WINDOW", 0))
+# Fetched blobs held back behind a materializing source image, by count and by bytes.
+EXPORT_LAZY_MAX_PENDING = int(os.getenv("EXPORT_LAZY_MAX_PENDING", 64))
+EXPORT_LAZY_MAX_PENDING_BYTES = int(os.getenv("EXPORT_LAZY_MAX_PENDING_BYTES", 64 * 1024 * 1024))
+
+
+def version_zip_path(version: Version, annotation_format: str) -> str:
+    """Return the storage path of a version export."""
+    return f"versions/{version.project.name}.v{version.version_number}.{annotation_format}.zip"
+
+
+def generate_data_yaml_content(class_names: list) -> bytes:
+    data = {
+        "train": "train/images",
+        "val": "valid/images",
+        "nc": len(class_names),
+        "names": class_names
+    }
+    buffer = StringIO()
+    yaml.dump(data, buffer)
+    return buffer.getvalue().encode("utf-8")
+
+def get_class_names(version: Version) -> dict:
+    """Return {class_id: name} of the version's project."""
+    annotation_group = AnnotationGroup.objects.filter(project=version.project).first()
+    if not annotation_group:
+        return {}
+    return dict(annotation_group.classes.all().order_by('class_id').values_list('class_id', 'name'))
+
+def source_annotations(row) -> dict:
+    """Return a row's annotations in the {"bboxes", "labels"} layout augmentations take."""
+    return {
+        "bboxes": [bbox for _, bbox in row.annotations],
+        "labels": [class_id for class_id, _ in row.annotations],
+    }
+
+def image_artifact_key(row) -> str:
+    """Artifact key of a row's source image payload."""
+    return artifact_key("image", hash_image(row.image_id, row.image_file))
+
+def lazy_artifact_key(row, parameters: dict) -> str:
+    """
+    Artifact key of the samples of a lazy augmentation row.
+
+    Samples only depend on the source image, its annotations and the seeded
+    policy, so those key the stored result.
+    """
+    return artifact_key("lazy", hash_image(row.image_id, row.image_file), hash_annotation_set(row.annotations), policy_hash(parameters))
+
+def materialize_samples(artifacts: ArtifactStore, row, image_bytes: bytes, parameters: dict, pipeline: AugmentationPipeline):
+    """Materialize a lazy augmentation row, reusing the samples stored by an earlier export."""
+    return artifacts.get_or_build(
+        lazy_artifact_key(row, parameters),
+        lambda: materialize(image_bytes, parameters, source_annotations(row), pipeline=pipeline),
+    )
+
+def image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Return the (width, height) of an encoded image from its header, or None if it cannot be read."""
+    try:
+        return PILImage.open(io.BytesIO(data)).size
+    except Exception:
+        return None
+
+def label_files(boxes_per_image: List[list], annotation_format: str) -> List[bytes]:
+    """
+    Return the label file content of each image, given its (class_id, [xmin, ymin, xmax, ymax]) boxes.
+
+    YOLO and Pascal VOC labels are formatted in bulk from box arrays; other formats go through `read_annotation`.
+    """
+    if annotation_format == "yolo":
+        image_index, class_id, xyxy = to_columnar(boxes_per_image)
+        return [labels.encode("utf-8") for labels in yolo_labels(image_index, class_id, xyxy, len(boxes_per_image))]
+
+    if annotation_format == "pascal":
+        image_index, class_id, xyxy = to_columnar(boxes_per_image)
+        return [labels.encode("utf-8") for labels in pascal_voc_objects(image_index, class_id, xyxy, len(boxes_per_image))]
+
+    return [
+        "".join(read_annotation(bbox=bbox, label=label, format=annotation_format) for label, bbox in boxes).encode("utf-8")
+        for boxes in boxes_per_image
+    ]
+
+def augmentation_boxes(augmented_annotation: Optional[dict]) -> list:
+    if not augmented_annotation:
+        return []
+    return list(zip(augmented_annotation['labels'], augmented_annotation['bboxes']))
+
+def generate_coco_entries(
+    version: Version,
+    class_names: dict,
+    skip=(),
+    lazy_samples=None,
+    artifacts: Optional[ArtifactStore] = None,
+    image_sizes: Optional[dict] = None,
+    missing_files=(),
+):
+    """
+    Yield one `<split>/_annotations.coco.json` entry per split of the version.
+
+    Boxes are gathered into arrays from a metadata-only pass over the version
+    and scaled to pixels with the size of each image. Sizes come from the image
+    rows, the augmented annotations or `image_sizes`; blobs are only read for
+    images this run did not measure (e.g. before a resume) and to redo lazy
+    augmentations this run did not produce, so the dataset covers every image
+    even when the archive itself was resumed from a checkpoint.
+
+    Args:
+        version (Version): The version instance.
+        class_names (dict): {class_id: name} of the project.
+        skip (Container[int]): Version image ids left out of the archive.
+        lazy_samples (dict): {version_image_id: [(name, labels, bboxes, width, height)]} of lazily augmented
+            samples written by this run; rows missing from it (e.g. before a resume) are materialized again.
+        artifacts (Optional[ArtifactStore]): Store to reuse source images and materialized samples from.
+        image_sizes (dict): {storage path: (width, height)} of images measured while writing the archive.
+        missing_files (Container[str]): Augmented image paths left out of the archive.
+    """
+    splits = defaultdict(lambda: {"images": [], "annotations": []})
+    lazy_samples = lazy_samples if lazy_samples is not None else {}
+    image_sizes = image_sizes if image_sizes is not None else {}
+    artifacts = artifacts or ArtifactStore()
+    fetcher = BlobFetcher(artifacts=artifacts)
+    pipeline = None
+
+    def size_of(path, width, height, key=None):
+        if width and height:
+            return width, height
+        if path not in image_sizes:
+            data = fetcher.read(path, key)
+            image_sizes[path] = image_size(data) if data is not None else None
+        return image_sizes[path]
+
+    def add_image(split, file_name, size, boxes):
+        split["images"].append({
+            "id": len(split["images"]) + 1,
+            "file_name": file_name,
+            "width": size[0],
+            "height": size[1],
+        })
+        split["annotations"].append(boxes)
+
+    for row in iter_version_export_rows(version):
+        if row.version_image_id in skip:
+            continue
+
+        split = splits[row.mode if row.mode else "default"]
+        size = size_of(row.image_file, row.width, row.height, image_artifact_key(row))
+        if size is None:
+            continue
+        add_image(split, f"{os.path.basename(row.image_file)}.jpg", size, row.annotations)
+
+        for augmented_image_file, augmented_annotation in row.augmentations:
+            if augmented_image_file in missing_files:
+                continue
+            annotation = augmented_annotation or {}
+            size = size_of(augmented_image_file, annotation.get("width"), annotation.get("height"))
+            if size is None:
+                continue
+            add_image(split, f"{os.path.basename(augmented_image_file)}.jpg", size, augmentation_boxes(augmented_annotation))
+
+        if row.lazy_augmentations and row.version_image_id not in lazy_samples:
+            pipeline = pipeline or AugmentationPipeline(output_dir=LAZY_AUGMENTATION_DIR)
+            image_bytes = fetcher.read(row.image_file, image_artifact_key(row))
+            lazy_samples[row.version_image_id] = [
+                sample_record(sample)
+                for parameters in (row.lazy_augmentations if image_bytes else [])
+                for sample in materialize_samples(artifacts, row, image_bytes, parameters, pipeline)
+            ]
+
+        for name, labels, bboxes, width, height in lazy_samples.get(row.version_image_id, []):
+            add_image(split, f"{name}.jpg", (width, height), list(zip(labels, bboxes)))
+
+    for prefix, split in splits.items():
+        image_index, class_id, xyxy = to_columnar(split["annotations"])
+        dataset = coco_dataset(image_index, class_id, xyxy, images=split["images"], class_names=class_names)
+        yield f"{prefix}/_annotations.coco.json", [json.dumps(dataset).encode("utf-8")], None
+
+def sample_record(sample) -> tuple:
+    """(name, labels, bboxes, width, height) of a materialized sample, as kept for the COCO annotations."""
+    width, height = (sample.width, sample.height) if sample.width else image_size(sample.read_image())
+    return sample.name, sample.labels.tolist(), sample.bboxes.tolist(), width, height
+
+def generate_zip_stream(
+    version: Version,
+    annotation_format: str,
+    task_id:str,
+    compression:str=EXPORT_ZIP_COMPRESSION,
+    resume_from:Optional[dict]=None,
+    on_boundary:Optional[Callable]=None,
+):
+    """
+    Generate a streaming zip file for a given version with annotations converted to the desired format.
+    This function uses zipstream to build the zip file on the fly; entries are produced
+    while the archive is iterated, with the next blobs downloaded concurrently.
+    Source images and materialized lazy samples are kept in the export `ArtifactStore`,
+    so later exports sharing them skip the download and the augmentation.
+    Label files are built in bulk for each chunk of rows.
+    COCO exports get a single annotations JSON per split instead of per-image label files.
+    Lazy augmentation rows are materialized from the downloaded source image on the
+    shared `AugmentationEngine` pool, up to EXPORT_LAZY_WINDOW images ahead of the writer.
+
+    Args:
+        version (Version): The version instance.
+        annotation_format (str): Desired annotation format (e.g., "yolo", "custom", etc.).
+        compression (str): Per-entry compression policy ("auto" stores images and deflates labels).
+        resume_from (Optional[dict]): Checkpoint to continue from; its archive bytes are not produced again.
+        on_boundary (Optional[Callable]): Called with (version_image_id, zip_state) after each image is written.
+
+    Returns:
+        zipstream.ZipFile: An iterable zip file stream.
+    """
+    z = LazyZipFile(mode='w', compression=zipstream.ZIP_DEFLATED, allowZip64=True, compression_policy=compression, on_boundary=on_boundary)
+    # z.write("start.txt", "Processing started...")
+    after_id = None
+    if resume_from:
+        z.restore(resume_from["zip_state"])
+        after_id = resume_from["marker"]
+
+    total = count_version_images(version)
+    artifacts = ArtifactStore()
+    fetcher = BlobFetcher(artifacts=artifacts)
+    per_image_labels = annotation_format != "coco"
+    missing_rows = set()
+    missing_files = set()
+    image_sizes = {}
+    lazy_samples = {}
+    engine = AugmentationEngine(output_dir=LAZY_AUGMENTATION_DIR)
+    lazy_window = EXPORT_LAZY_WINDOW or max(2, 2 * engine.workers)
+
+    def blobs():
+        rows = iter_version_export_rows(version, after_id=after_id)
+        while True:
+            chunk = list(islice(rows, EXPORT_CHUNK_SIZE))
+            if not chunk:
+                break
+
+            labels = None
+            if per_image_labels:
+                labels = iter(label_files([
+                    boxes
+                    for row in chunk
+                    for boxes in [row.annotations] + [augmentation_boxes(annotation) for _, annotation in row.augmentations]
+                ], annotation_format))
+
+            for row in chunk:
+                yield row, None, row.image_file, next(labels) if labels else None
+                for augmentation in row.augmentations:
+                    yield row, augmentation, augmentation[0], next(labels) if labels else None
+
+    def submit_lazy(row, data) -> list:
+        """Start materializing the lazy augmentations of a fetched source image; stored samples are reused."""
+        futures = []
+        for parameters in row.lazy_augmentations:
+            key = lazy_artifact_key(row, parameters)
+            samples = artifacts.get_object(key)
+            if samples is None:
+                futures.append((key, submit_materialize(engine, data, parameters, source_annotations(row))))
+            else:
+                future = Future()
+                future.set_result(samples)
+                futures.append((None, future))
+        return futures
+
+    def materialized(fetched):
+        """
+        Add the lazy sample futures of each fetched blob.
+
+        The head blob is handed out as soon as its samples are done. Otherwise it
+        is only waited on once `lazy_window` source images are materializing or
+        the blobs queued behind it reach EXPORT_LAZY_MAX_PENDING entries or
+        EXPORT_LAZY_MAX_PENDING_BYTES.
+        """
+        pending, in_flight, pending_bytes = deque(), 0, 0
+
+        def ready():
+            futures = pending[0][2]
+            return (
+                all(future.done() for _, future in futures)
+                or in_flight > lazy_window
+                or len(pending) > EXPORT_LAZY_MAX_PENDING
+                or pending_bytes > EXPORT_LAZY_MAX_PENDING_BYTES
+            )
+
+        for blob, data in fetched:
+            row, augmentation = blob[0], blob[1]
+            futures = submit_lazy(row, data) if augmentation is None and data is not None and row.lazy_augmentations else []
+            pending.append((blob, data, futures))
+            in_flight += bool(futures)
+            pending_bytes += len(data) if data else 0
+            while pending and ready():
+                item = pending.popleft()
+                in_flight -= bool(item[2])
+                pending_bytes -= len(item[1]) if item[1] else 0
+                yield item
+        while pending:
+            yield pending.popleft()
+
+    def entries():
+        missing = None
+        processed = total - count_version_images(version, after_id=after_id) if after_id else 0
+        last_row = None
+        for (row, augmentation, path, label_bytes), data, lazy_futures in materialized(fetcher.fetch(
+            blobs(),
+            path=lambda blob: blob[2],
+            key=lambda blob: image_artifact_key(blob[0]) if blob[1] is None else None,
+        )):
+            prefix = row.mode if row.mode else "default"
+            image_basename = os.path.basename(row.image_file)
+
+            if augmentation is None:
+                if last_row is not None:
+                    yield EntryBoundary(marker=last_row.version_image_id)
+                last_row = row
+                processed += 1
+                track_progress(task_id=task_id, percentage=round((processed / total) * 100), status="Zipping Files ...")
+                if data is None:
+                    print(f"Image not found in storage: {path}")
+                    missing = row.version_image_id
+                    missing_rows.add(missing)
+                    continue
+
+                yield f"{prefix}/images/{image_basename}.jpg", [data], None
+                if not per_image_labels and not (row.width and row.height):
+                    image_sizes[path] = image_size(data)
+
+                if per_image_labels:
+                    yield f"{prefix}/labels/{image_basename}.txt", [label_bytes], None
+
+                samples = []
+                for key, future in lazy_futures:
+                    samples.extend(future.result())
+                    if key:
+                        artifacts.put_object(key, future.result())
+                sample_labels = label_files([list(zip(sample.labels.tolist(), sample.bboxes.tolist())) for sample in samples], annotation_format) if per_image_labels else []
+                for i, sample in enumerate(samples):
+                    yield f"{prefix}/images/{sample.name}.jpg", [sample.image_bytes], None
+                    if per_image_labels:
+                        yield f"{prefix}/labels/{sample.name}.txt", [sample_labels[i]], None
+                    else:
+                        # Kept for the COCO annotations written after all images.
+                        lazy_samples.setdefault(row.version_image_id, []).append(sample_record(sample))
+                continue
+
+            if row.version_image_id == missing:
+                continue
+
+            # Create filenames that include the augmentation name.
+            augmented_image_file, augmented_annotation = augmentation
+            aug_image_filename = f"{os.path.basename(augmented_image_file)}.jpg"
+            aug_annotation_filename = f"{os.path.basename(augmented_image_file)}.txt"
+
+            if data is not None:
+                yield f"{prefix}/images/{aug_image_filename}", [data], None
+                if not per_image_labels and not (augmented_annotation or {}).get("width"):
+                    image_sizes[path] = image_size(data)
+            else:
+                print(f"Error adding augmented image for {image_basename}: {path} not found")
+                missing_files.add(path)
+
+            if augmented_annotation and per_image_labels:
+                yield f"{prefix}/labels/{aug_annotation_filename}", [label_bytes], None
+
+        engine.close()
+        print(f"Export artifacts reused: {artifacts.hits}, built: {artifacts.misses}")
+
+    z.write_entries(entries())
+
+    if annotation_format == "coco":
+        z.write_entries(generate_coco_entries(
+            version,
+            get_class_names(version),
+            skip=missing_rows,
+            lazy_samples=lazy_samples,
+            artifacts=artifacts,
+            image_sizes=image_sizes,
+            missing_files=missing_files,
+        ))
+
+    if annotation_format == "yolo":
+        class_names = list(get_class_names(version).values())
+        yaml_content = generate_data_yaml_content(class_names)
+        z.writestr(f"data.yaml", yaml_content)
+
+    return z
+
+def generate_and_upload_streaming(
+    version: Version,
+    format: str,
+    blob_client,
+    compression: str = EXPORT_ZIP_COMPRESSION,
+    task_id: str = "streaming",
+    lock: Optional[ExportLock] = None,
+):
+    """
+    Generate zip and upload simultaneously without storing locally.
+
+    Progress is checkpointed per (blob, compression); if a previous attempt failed
+    mid-upload, staged blocks are kept and the export resumes after the last
+    image covered by them. A held `lock` is kept alive for the whole export
+    (including the COCO pass and waits on lazy samples) and re-checked before
+    every checkpoint and the final commit, so an export whose lock was taken
+    over stops with `ExportLockLost`.
+    """
+    checkpoint_store = ExportCheckpointStore(key=f"{blob_client.blob_name}:{compression}")
+    checkpoint = checkpoint_store.load()
+    if checkpoint:
+        print(f"Resuming export after version image {checkpoint['marker']} ({checkpoint['block_count']} blocks staged)")
+
+    uploader = BlockUploader(
+        blob_client,
+        checkpoint_store=checkpoint_store,
+        resume_from=checkpoint,
+        guard=lock.ensure_owned if lock else None,
+    )
+
+    def on_boundary(marker, zip_state):
+        uploader.checkpoint(marker, zip_state)
+
+    zip_stream = generate_zip_stream(
+        version,
+        format,
+        task_id=task_id,
+        compression=compression,
+        resume_from=checkpoint,
+        on_boundary=on_boundary,
+    )
+    
+    try:
+        with lock.keep_alive() if lock else nullcontext():
+            for chunk in zip_stream:
+                uploader.write(chunk)
+            uploader.finalize()
+    except Exception as e:
+        uploader.abort()
+        print(f"Upload failed: {e}")
+        raise
+
+
+def export_version(version: Version, annotation_format: str, task_id: str, compression: str = EXPORT_ZIP_COMPRESSION) -> str:
+    """
+    Export a version to storage once and return its URL.
+
+    Only one export per (version, format) runs at a time; a concurrent caller
+    follows the running export's progress and returns its URL when done.
+
+    Args:
+        version (Version): The version instance.
+        annotation_format (str): Desired annotation format.
+        task_id (str): Progress id to report to.
+        compression (str): Per-entry compression policy.
+
+    Returns:
+        str: URL of the exported zip.
+    """
+    version_zip_rel_path = version_zip_path(version, annotation_format)
+    if default_storage.exists(version_zip_rel_path):
+        track_progress(task_id=task_id, percentage=100, status="Completed")
+        return default_storage.url(version_zip_rel_path)
+
+    # Single flight per (version, format): concurrent requesters follow the running export.
+    lock = ExportLock(key=version_zip_rel_path, owner=task_id)
+    while not lock.acquire():
+        lock.wait(
+            on_progress=lambda progress: track_progress(
+                task_id=task_id,
+                percentage=progress["percentage"],
+                status=progress["status"],
+                message=progress.get("message"),
+            )
+        )
+        if default_storage.exists(version_zip_rel_path):
+            track_progress(task_id=task_id, percentage=100, status="Completed")
+            return default_storage.url(version_zip_rel_path)
+
+    try:
+        if default_storage.exists(version_zip_rel_path):
+            track_progress(task_id=task_id, percentage=100, status="Completed")
+            return default_storage.url(version_zip_rel_path)
+
+        track_progress(task_id=task_id, percentage=0, status="Starting upload ... might take a while")
+        blob_client = default_storage.client.get_blob_client(
+            blob=version_zip_rel_path
+        )
+        
+        # Stream directly to Azure without local storage
+        generate_and_upload_streaming(version, annotation_format, blob_client, compression=compression, task_id=task_id, lock=lock)
+        
+        # Update version record
+        version.version_file = version_zip_rel_path
+        version.save(update_fields=["version_file"])
+    finally:
+        lock.release()
+
+    track_progress(task_id=task_id, percentage=100, status="Completed")
+    return version.version_file.url
@@ -0,0 +1,99 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Tuple, TypeVar
+from django.core.files.storage import default_storage
+
+try:
+    from azure.core.exceptions import ResourceNotFoundError
+except ImportError:
+    ResourceNotFoundError = FileNotFoundError
+
+EXPORT_FETCH_WINDOW = int(os.getenv("EXPORT_FETCH_WINDOW", 16))
+EXPORT_FETCH_MAX_BYTES = int(os.getenv("EXPORT_FETCH_MAX_BYTES", 256 * 1024 * 1024))
+
+T = TypeVar("T")
+_END = object()
+
+
+class BlobFetcher:
+    """
+    Download storage blobs concurrently while handing them out in input order.
+
+    Up to `window` downloads run at once; new downloads are only started while
+    the completed-but-unconsumed payloads stay below `max_bytes`, so memory is
+    bounded by roughly `max_bytes` plus one window of blobs.
+
+    With an `artifacts` store, blobs fetched with an artifact key are read from
+    and kept in the store instead of being downloaded by every export.
+    """
+
+    def __init__(self, storage=default_storage, window: int = EXPORT_FETCH_WINDOW, max_bytes: int = EXPORT_FETCH_MAX_BYTES, artifacts=None):
+        self.storage = storage
+        self.window = max(1, window)
+        self.max_bytes = max_bytes
+        self.artifacts = artifacts
+        self._buffered = 0
+        self._lock = threading.Lock()
+
+    def read(self, path: str, key: Optional[str] = None) -> Optional[bytes]:
+        """Return the blob content, or None if the blob does not exist."""
+        if not path:
+            return None
+
+        data = self.artifacts.get(key) if key and self.artifacts else None
+        if data is None:
+            try:
+                with self.storage.open(path, "rb") as f:
+                    data = f.read()
+            except (FileNotFoundError, ResourceNotFoundError):
+                return None
+            if key and self.artifacts:
+                self.artifacts.put(key, data)
+
+        with self._lock:
+            self._buffered += len(data)
+        return data
+
+    def fetch(
+        self,
+        items: Iterable[T],
+        path: Callable[[T], str] = lambda item: item,
+        key: Callable[[T], Optional[str]] = lambda item: None,
+    ) -> Iterator[Tuple[T, Optional[bytes]]]:
+        """
+        Yield (item, content) pairs in the order of `items`.
+
+        Args:
+            items (Iterable[T]): Items to fetch.
+            path (Callable[[T], str]): Returns the storage path of an item.
+            key (Callable[[T], Optional[str]]): Returns the artifact key of an item, or None to always download it.
+
+        Returns:
+            Iterator[Tuple[T, Optional[bytes]]]: Content is None for missing blobs.
+        """
+        items = iter(items)
+        pending = deque()
+        exhausted = False
+        executor = ThreadPoolExecutor(max_workers=self.window, thread_name_prefix="blob-fetch")
+        try:
+            while True:
+                while not exhausted and len(pending) < self.window and (not pending or self._buffered < self.max_bytes):
+                    item = next(items, _END)
+                    if item is _END:
+                        exhausted = True
+                        break
+                    pending.append((item, executor.submit(self.read, path(item), key(item))))
+
+                if not pending:
+                    break
+
+                item, future = pending.popleft()
+                data = future.result()
+                if data is not None:
+                    with self._lock:
+                        self._buffered -= len(data)
+                yield item, data
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
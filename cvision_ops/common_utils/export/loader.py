@@ -0,0 +1,124 @@
+import os
+from itertools import islice
+from collections import defaultdict, namedtuple
+from typing import Iterable, Iterator, Optional
+from projects.models import Version, VersionImage
+from annotations.models import Annotation
+from augmentations.models import VersionImageAugmentation
+from common_utils.augmentation.lazy import LAZY_AUGMENTATION_NAME
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 2000))
+
+VersionExportRow = namedtuple(
+    "VersionExportRow",
+    [
+        "version_image_id",
+        "project_image_id",
+        "mode",
+        "image_id",
+        "image_name",
+        "image_file",
+        "width",
+        "height",
+        "marked_as_null",
+        "annotations",      # list of (class_id, [xmin, ymin, xmax, ymax])
+        "augmentations",    # list of (augmented_image_file, augmented_annotation)
+        "lazy_augmentations",   # list of seeded policies (parameters of lazy augmentation rows)
+    ],
+)
+
+
+def count_version_images(version: Version, after_id: Optional[int] = None) -> int:
+    version_images = VersionImage.objects.filter(version=version)
+    if after_id is not None:
+        version_images = version_images.filter(id__gt=after_id)
+    return version_images.count()
+
+
+def iter_version_export_rows(
+    version: Version,
+    version_image_ids: Optional[Iterable[int]] = None,
+    after_id: Optional[int] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[VersionExportRow]:
+    """
+    Stream every image of a version with its mode, active annotations and augmentations.
+
+    Version images are read through a server-side cursor in chunks of `chunk_size`;
+    annotations and augmentations are fetched once per chunk, so the number of
+    queries is 1 + 2 * ceil(n / chunk_size) regardless of the number of boxes.
+
+    Args:
+        version (Version): Version to export.
+        version_image_ids (Optional[Iterable[int]]): Restrict the export to these version images.
+        after_id (Optional[int]): Only stream version images with a greater id (used to resume).
+        chunk_size (int): Number of version images fetched per round trip.
+
+    Returns:
+        Iterator[VersionExportRow]: One plain tuple per version image.
+    """
+    version_images = VersionImage.objects.filter(version=version)
+    if version_image_ids is not None:
+        version_images = version_images.filter(id__in=version_image_ids)
+    if after_id is not None:
+        version_images = version_images.filter(id__gt=after_id)
+
+    version_images = (
+        version_images
+        .order_by("id")
+        .values_list(
+            "id",
+            "project_image_id",
+            "project_image__mode__mode",
+            "project_image__image__image_id",
+            "project_image__image__image_name",
+            "project_image__image__image_file",
+            "project_image__image__width",
+            "project_image__image__height",
+            "project_image__marked_as_null",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+    while True:
+        chunk = list(islice(version_images, chunk_size))
+        if not chunk:
+            break
+
+        annotations = defaultdict(list)
+        for project_image_id, class_id, data in (
+            Annotation.objects
+            .filter(project_image_id__in=[row[1] for row in chunk], is_active=True)
+            .order_by("id")
+            .values_list("project_image_id", "annotation_class__class_id", "data")
+        ):
+            annotations[project_image_id].append((class_id, data))
+
+        augmentations = defaultdict(list)
+        lazy_augmentations = defaultdict(list)
+        for version_image_id, augmentation_name, parameters, augmented_image_file, augmented_annotation in (
+            VersionImageAugmentation.objects
+            .filter(version_image_id__in=[row[0] for row in chunk])
+            .order_by("id")
+            .values_list("version_image_id", "augmentation_name", "parameters", "augmented_image_file", "augmented_annotation")
+        ):
+            if augmentation_name == LAZY_AUGMENTATION_NAME:
+                lazy_augmentations[version_image_id].append(parameters)
+            else:
+                augmentations[version_image_id].append((augmented_image_file, augmented_annotation))
+
+        for version_image_id, project_image_id, mode, image_id, image_name, image_file, width, height, marked_as_null in chunk:
+            yield VersionExportRow(
+                version_image_id=version_image_id,
+                project_image_id=project_image_id,
+                mode=mode,
+                image_id=image_id,
+                image_name=image_name,
+                image_file=image_file,
+                width=width,
+                height=height,
+                marked_as_null=marked_as_null,
+                annotations=annotations.get(project_image_id, []),
+                augmentations=augmentations.get(version_image_id, []),
+                lazy_augmentations=lazy_augmentations.get(version_image_id, []),
+            )
@@ -0,0 +1,135 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, Optional
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from projects.models import VersionExportLock
+from common_utils.progress.core import get_progress
+
+EXPORT_LOCK_TIMEOUT = int(os.getenv("EXPORT_LOCK_TIMEOUT", 60 * 10))
+EXPORT_LOCK_REFRESH_INTERVAL = float(os.getenv("EXPORT_LOCK_REFRESH_INTERVAL", 30))
+EXPORT_LOCK_POLL_INTERVAL = float(os.getenv("EXPORT_LOCK_POLL_INTERVAL", 2))
+
+
+class ExportLockLost(RuntimeError):
+    """The export lock expired and was taken over by another export."""
+
+
+class ExportLock:
+    """
+    Single-flight lock for an export, stored as a `VersionExportLock` row.
+
+    Acquisition locks the row (or inserts it, under its unique key) in a
+    transaction, so only one caller can hold it. The holder is the progress id
+    of the request doing the work, so concurrent requesters can follow that
+    export's progress instead of starting their own.
+
+    The lock is a lease: it expires `timeout` seconds after the last `refresh`,
+    so an export whose worker died is taken over. `keep_alive` refreshes it in
+    the background while the export runs, however long any single step takes.
+    A holder that finds the lock taken over on `refresh` gets `ExportLockLost`
+    and must stop writing.
+    """
+
+    def __init__(self, key: str, owner: str, timeout: int = EXPORT_LOCK_TIMEOUT, refresh_interval: float = EXPORT_LOCK_REFRESH_INTERVAL):
+        self.key = key
+        self.owner = owner
+        self.timeout = timeout
+        self.refresh_interval = refresh_interval
+        self._refreshed_at = None
+
+    def _expires_at(self):
+        return timezone.now() + timedelta(seconds=self.timeout)
+
+    def acquire(self) -> bool:
+        with transaction.atomic():
+            lock, created = VersionExportLock.objects.select_for_update().get_or_create(
+                key=self.key,
+                defaults={"owner": self.owner, "expires_at": self._expires_at()},
+            )
+            if not created:
+                if lock.owner != self.owner and lock.expires_at > timezone.now():
+                    return False
+                lock.owner = self.owner
+                lock.expires_at = self._expires_at()
+                lock.save(update_fields=["owner", "expires_at", "updated_at"])
+
+        self._refreshed_at = time.monotonic()
+        return True
+
+    def holder(self) -> Optional[str]:
+        return (
+            VersionExportLock.objects
+            .filter(key=self.key, expires_at__gt=timezone.now())
+            .values_list("owner", flat=True)
+            .first()
+        )
+
+    def refresh(self, force: bool = False):
+        """
+        Extend the lease, at most once per `refresh_interval` unless `force` is set.
+
+        Raises:
+            ExportLockLost: If another owner took the lock over.
+        """
+        if not force and self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+
+        updated = VersionExportLock.objects.filter(key=self.key, owner=self.owner).update(
+            expires_at=self._expires_at(), updated_at=timezone.now()
+        )
+        if not updated:
+            raise ExportLockLost(f"Export lock {self.key} is no longer held by {self.owner}")
+        self._refreshed_at = time.monotonic()
+
+    def ensure_owned(self):
+        """Check that the lock is still held, extending it; call before any write that must not be duplicated."""
+        self.refresh(force=True)
+
+    @contextmanager
+    def keep_alive(self):
+        """Refresh the lease every `refresh_interval` seconds on a background thread while the block runs."""
+        stop = threading.Event()
+
+        def beat():
+            try:
+                while not stop.wait(self.refresh_interval):
+                    try:
+                        self.refresh(force=True)
+                    except ExportLockLost:
+                        # The holder finds out through `ensure_owned` before its next write.
+                        return
+                    except DatabaseError as e:
+                        print(f"Failed to refresh export lock {self.key}: {e}")
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=beat, name="export-lock-heartbeat", daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            thread.join()
+
+    def release(self):
+        VersionExportLock.objects.filter(key=self.key, owner=self.owner).delete()
+
+    def wait(self, on_progress: Optional[Callable[[dict], None]] = None, poll_interval: float = EXPORT_LOCK_POLL_INTERVAL):
+        """
+        Block until the current holder releases the lock or its lease expires.
+
+        Args:
+            on_progress (Optional[Callable[[dict], None]]): Called with the holder's progress on every poll.
+            poll_interval (float): Seconds between polls.
+        """
+        holder = self.holder()
+        while holder and holder != self.owner:
+            progress = get_progress(holder)
+            if progress and on_progress:
+                on_progress(progress)
+            time.sleep(poll_interval)
+            holder = self.holder()
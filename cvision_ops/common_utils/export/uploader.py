@@ -0,0 +1,231 @@
+import os
+import time
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+EXPORT_BLOCK_SIZE = int(os.getenv("EXPORT_BLOCK_SIZE", 8 * 1024 * 1024))
+EXPORT_UPLOAD_CONCURRENCY = int(os.getenv("EXPORT_UPLOAD_CONCURRENCY", 8))
+EXPORT_UPLOAD_MAX_BYTES = int(os.getenv("EXPORT_UPLOAD_MAX_BYTES", 128 * 1024 * 1024))
+
+
+def block_id(index: int) -> str:
+    """Return the id of the block at `index`; ids sort in block order and have a fixed length."""
+    return f"{index:06d}"
+
+
+class BlockUploader:
+    """
+    File-like sink that stages fixed-size blocks of a blob concurrently.
+
+    Writes are buffered into `chunk_size` blocks which are staged on a thread
+    pool while the producer keeps writing. At most `max_in_flight` blocks (and
+    no more than `max_bytes` of block data) are queued or uploading at once;
+    further writes block until a slot frees up. `finalize` waits for every
+    block and commits the block list in order.
+
+    With a `checkpoint_store`, blocks are preferably cut at the points passed to
+    `checkpoint` and the latest point whose blocks are all staged is persisted,
+    so a new uploader created with `resume_from` continues after it. Once the
+    store stops accepting checkpoints, the uploader stops recording them.
+
+    `guard` is called before every checkpoint is persisted and before the block
+    list is committed; it raises to stop an uploader that must no longer write
+    (e.g. because its export lock was taken over).
+    """
+
+    def __init__(
+        self,
+        blob_client,
+        chunk_size: int = EXPORT_BLOCK_SIZE,
+        max_in_flight: int = EXPORT_UPLOAD_CONCURRENCY,
+        max_bytes: int = EXPORT_UPLOAD_MAX_BYTES,
+        max_retries: int = 3,
+        checkpoint_store=None,
+        resume_from: Optional[dict] = None,
+        guard: Optional[Callable[[], None]] = None,
+    ):
+        self.blob_client = blob_client
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.max_in_flight = max(1, min(max_in_flight, max_bytes // chunk_size))
+        self.buffer = bytearray()
+        self.block_ids: List[str] = [block_id(i) for i in range(resume_from["block_count"])] if resume_from else []
+        self.chunk_id = len(self.block_ids)
+        self.bytes_staged = 0
+        self.checkpoint_store = checkpoint_store
+        self.guard = guard
+        self._checkpointing = checkpoint_store is not None
+        self._staged = set(range(self.chunk_id))
+        self._contiguous = self.chunk_id
+        self._pending_checkpoints = []
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="block-upload")
+        self._futures = []
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+
+    def write(self, data):
+        self.buffer += data
+        # When checkpointing, leave room to cut blocks at checkpoint boundaries.
+        if len(self.buffer) >= self.chunk_size * (2 if self._checkpointing else 1):
+            self.flush_chunk()
+
+    def checkpoint(self, marker, zip_state: dict):
+        """
+        Record a resumable point; all archive bytes up to it have been written.
+
+        Args:
+            marker: Opaque position of the producer (e.g. the last version image id).
+            zip_state (dict): Archive state from `LazyZipFile.zip_state`.
+        """
+        if not self._checkpointing:
+            return
+
+        with self._lock:
+            self._pending_checkpoints.append({
+                "marker": marker,
+                "offset": zip_state["offset"],
+                "records": zip_state["records"],
+                "block_count": None,
+            })
+        if len(self.buffer) < self.chunk_size:
+            return
+
+        self.flush_chunk()
+        # Every pending point up to here is covered once the block just cut is staged.
+        with self._lock:
+            for pending in self._pending_checkpoints:
+                if pending["block_count"] is None:
+                    pending["block_count"] = len(self.block_ids)
+        self._persist_checkpoint()
+
+    def _persist_checkpoint(self):
+        # Only called from the producer thread, so the store and guard never run on upload threads.
+        with self._lock:
+            ready, records = None, []
+            while self._pending_checkpoints and self._pending_checkpoints[0]["block_count"] is not None and self._pending_checkpoints[0]["block_count"] <= self._contiguous:
+                ready = self._pending_checkpoints.pop(0)
+                records.extend(ready["records"])
+
+        if ready:
+            if self.guard:
+                self.guard()
+            if not self.checkpoint_store.save(ready["marker"], ready["offset"], ready["block_count"], records):
+                self._checkpointing = False
+                self._pending_checkpoints = []
+
+    def flush_chunk(self):
+        if self._error:
+            raise self._error
+
+        if not self.buffer:
+            return
+
+        data, self.buffer = bytes(self.buffer), bytearray()
+        staged_id = block_id(self.chunk_id)
+        self.block_ids.append(staged_id)
+        self.chunk_id += 1
+
+        self._slots.acquire()
+        future = self._executor.submit(self._stage_block, staged_id, data)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+
+    def _stage_block(self, block_id: str, data: bytes):
+        for attempt in range(self.max_retries):
+            try:
+                self.blob_client.stage_block(block_id=block_id, data=data)
+                break
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    self._error = e
+                    raise e
+                time.sleep(2 ** attempt)
+
+        with self._lock:
+            self.bytes_staged += len(data)
+            self._staged.add(int(block_id))
+            while self._contiguous in self._staged:
+                self._contiguous += 1
+        print(f"Uploaded block {block_id}")
+
+    def finalize(self):
+        try:
+            self.flush_chunk()  # Upload any remaining data
+            for future in self._futures:
+                future.result()
+            if self.guard:
+                self.guard()
+            if self.block_ids:
+                self.blob_client.commit_block_list(self.block_ids)
+            if self.checkpoint_store:
+                self.checkpoint_store.clear()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def abort(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class LocalBlobClient:
+    """
+    File-backed stand-in for an Azure `BlobClient`, used to run and benchmark
+    block uploads offline. Staged blocks are kept as files next to the blob
+    until the block list is committed.
+    """
+
+    def __init__(self, path: str, latency: float = 0.0):
+        self.path = Path(path)
+        self.blob_name = self.path.name
+        self.blocks_dir = self.path.parent / f".{self.path.name}.blocks"
+        self.latency = latency
+
+    def stage_block(self, block_id: str, data: bytes, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        self.blocks_dir.mkdir(parents=True, exist_ok=True)
+        (self.blocks_dir / block_id).write_bytes(data)
+
+    def commit_block_list(self, block_list: List[str], **kwargs):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "wb") as blob:
+            for block_id in block_list:
+                with open(self.blocks_dir / block_id, "rb") as block:
+                    while True:
+                        chunk = block.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        blob.write(chunk)
+
+        for block in self.blocks_dir.iterdir():
+            block.unlink()
+        self.blocks_dir.rmdir()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+
+# Example usage
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Benchmark BlockUploader against a local blob stand-in")
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated per-block round trip in seconds")
+    parser.add_argument("--in-flight", type=int, default=EXPORT_UPLOAD_CONCURRENCY)
+    args = parser.parse_args()
+
+    payload = os.urandom(1024 * 1024)
+    with tempfile.TemporaryDirectory() as tmp:
+        for in_flight in sorted({1, args.in_flight}):
+            blob_client = LocalBlobClient(os.path.join(tmp, f"blob_{in_flight}.zip"), latency=args.latency)
+            uploader = BlockUploader(blob_client, max_in_flight=in_flight)
+            start = time.perf_counter()
+            for _ in range(args.size_mb):
+                uploader.write(payload)
+            uploader.finalize()
+            duration = time.perf_counter() - start
+            print(f"in_flight={in_flight}: {args.size_mb / duration:.1f} MB/s ({duration:.2f}s)")
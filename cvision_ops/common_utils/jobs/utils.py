@@ -1,21 +1,75 @@
 from jobs.models import Job, JobImage
 from uuid import UUID
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from projects.models import ProjectImage
 from django.db import transaction
-from django.db.models import Count
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils.timezone import now
 
+# Job counter field -> condition on its job images, over the job's active images.
+JOB_PROGRESS_COUNTERS = {
+    "total_images": Q(),
+    "annotated_images": Q(project_image__status="annotated"),
+    "reviewed_images": Q(project_image__status="reviewed"),
+    "dataset_images": Q(project_image__status="dataset"),
+    "null_images": Q(project_image__marked_as_null=True),
+}
+
+# Job counter field -> condition on its job images, over all of the job's images.
+JOB_IMAGE_COUNTERS = {
+    "image_count": Q(),
+    "annotated_image_count": Q(project_image__status="annotated"),
+    "reviewed_image_count": Q(project_image__status="reviewed"),
+    "dataset_image_count": Q(project_image__status="dataset"),
+}
+
+def _job_image_count(condition: Q = Q(), **filters):
+    counts = (
+        JobImage.objects
+        .filter(condition, job=OuterRef("pk"), **filters)
+        .order_by()
+        .values("job")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+def refresh_job_counters(job_ids):
+    """
+    Recount the image and progress counters of several jobs with a single UPDATE.
+
+    `job_ids` may be a list or a queryset of ids, so callers can refresh the
+    jobs of changed project images without fetching them first.
+    """
+    updates = {
+        field: _job_image_count(condition, project_image__is_active=True)
+        for field, condition in JOB_PROGRESS_COUNTERS.items()
+    }
+    updates.update({field: _job_image_count(condition) for field, condition in JOB_IMAGE_COUNTERS.items()})
+    Job.objects.filter(id__in=job_ids).update(**updates)
+
+def refresh_project_image_jobs(project_image_ids):
+    """Refresh the counters of the jobs holding the given project images, after a status change."""
+    refresh_job_counters(
+        JobImage.objects.filter(project_image_id__in=project_image_ids).values("job_id")
+    )
+
 def update_job_status(job: Job):
-    images = job.images.select_related("project_image").all()
-    statuses = [img.project_image.status for img in images]
+    # Over all of the job's images, inactive ones included (the progress
+    # counters only cover active images), counted in a single query.
+    counts = job.images.aggregate(
+        total=Count("id"),
+        completed=Count("id", filter=Q(project_image__status__in=["reviewed", "dataset"])),
+        in_review=Count("id", filter=Q(project_image__status__in=["annotated", "reviewed"])),
+    )
 
     if not job.assignee:
         job.status = "unassigned"
-    elif all(s in ["reviewed", "dataset"] for s in statuses):
+    elif counts["completed"] == counts["total"]:
         job.status = "completed"
-    elif all(s in ["annotated", "reviewed"] for s in statuses):
+    elif counts["in_review"] == counts["total"]:
         job.status = "in_review"
     else:
         job.status = "assigned"
@@ -45,26 +99,11 @@ def assign_image_to_available_job(project_image: ProjectImage, max_per_job: int
                     project_image.job_assignment_status = 'assigned'
                     project_image.save(update_fields=["job_assignment_status"])
 
-                    job.image_count = job.current_count + 1
-                    job.save(update_fields=['image_count'])
+                    refresh_job_counters([job.id])
 
             return job
 
-    latest_job = (
-        Job.objects
-        .filter(project=project_image.project, name__startswith="Auto Job")
-        .order_by("-created_at")
-        .first()
-    )
-
-    next_number = 1
-    if latest_job and latest_job.name.strip().startswith("Auto Job"):
-        import re
-        match = re.search(r"Auto Job (\d+)", latest_job.name)
-        if match:
-            next_number = int(match.group(1)) + 1
-
-    new_job_name = f"Auto Job {next_number}"
+    new_job_name = f"Auto Job {next_job_number(project_image.project, 'Auto Job')}"
     with transaction.atomic():
         new_job = Job.objects.create(
             project=project_image.project,
@@ -76,30 +115,104 @@ def assign_image_to_available_job(project_image: ProjectImage, max_per_job: int
         JobImage.objects.create(job=new_job, project_image=project_image)
         project_image.job_assignment_status = 'assigned'
         project_image.save(update_fields=["job_assignment_status"])
+        refresh_job_counters([new_job.id])
         return new_job
 
-def assign_uploaded_image_to_batch(project_image, batch_id: Optional[str], user=None):
-    if not batch_id:
-        return assign_image_to_available_job(project_image)  # Fallback for production
-
+def next_job_number(project, prefix: str) -> int:
     latest_job = (
         Job.objects
-        .filter(project=project_image.project, name__startswith="Job")
+        .filter(project=project, name__startswith=prefix)
         .order_by("-created_at")
         .first()
     )
 
     next_number = 1
-    if latest_job and latest_job.name.strip().startswith("Job"):
+    if latest_job and latest_job.name.strip().startswith(prefix):
         import re
-        match = re.search(r"Job (\d+)", latest_job.name)
+        match = re.search(rf"{prefix} (\d+)", latest_job.name)
         if match:
             next_number = int(match.group(1)) + 1
 
-    new_job_name = f"Job {next_number}"
+    return next_number
+
+def assign_images_to_available_jobs(project_images: List[ProjectImage], max_per_job: int = 50) -> List[Job]:
+    """
+    Bulk version of `assign_image_to_available_job` for project images of one project.
+
+    Current job fill is computed once; images are packed into the open jobs
+    (oldest first) up to `max_per_job`, then into new "Auto Job k" jobs. Job
+    images, assignment statuses and job counts are written in bulk.
+    Images already in a job are left where they are.
+    Returns the jobs that received images.
+    """
+    if not project_images:
+        return []
+
+    project = project_images[0].project
+    assigned = set(
+        JobImage.objects
+        .filter(project_image__in=[project_image.id for project_image in project_images])
+        .values_list("project_image_id", flat=True)
+    )
+    pending, seen = [], set(assigned)
+    for project_image in project_images:
+        if project_image.id not in seen:
+            seen.add(project_image.id)
+            pending.append(project_image)
+    if not pending:
+        return []
+
+    available_jobs = Job.objects.filter(
+        project=project,
+        status__in=["unassigned", "assigned"]
+    ).annotate(current_count=Count("images")).order_by("created_at")
+
+    with transaction.atomic():
+        job_images, jobs = [], []
+        remaining = iter(pending)
+        for job in available_jobs:
+            free = len(pending) if job.image_count is None else max_per_job - job.current_count
+            batch = [project_image for _, project_image in zip(range(max(free, 0)), remaining)]
+            if not batch:
+                continue
+            jobs.append(job)
+            job_images.extend(JobImage(job=job, project_image=project_image) for project_image in batch)
+
+        left = list(remaining)
+        if left:
+            first_number = next_job_number(project, "Auto Job")
+            new_jobs = Job.objects.bulk_create([
+                Job(
+                    project=project,
+                    name=f"Auto Job {first_number + k}",
+                    description="Automatically created job for new incoming images",
+                    status="unassigned",
+                    image_count=0,
+                )
+                for k in range((len(left) + max_per_job - 1) // max_per_job)
+            ])
+            for k, job in enumerate(new_jobs):
+                jobs.append(job)
+                job_images.extend(
+                    JobImage(job=job, project_image=project_image)
+                    for project_image in left[k * max_per_job:(k + 1) * max_per_job]
+                )
+
+        JobImage.objects.bulk_create(job_images)
+        ProjectImage.objects.filter(
+            id__in=[project_image.id for project_image in pending]
+        ).update(job_assignment_status="assigned")
+        refresh_job_counters([job.id for job in jobs])
+
+    for project_image in pending:
+        project_image.job_assignment_status = "assigned"
+    return jobs
+
+def get_or_create_batch_job(project, batch_id: str, user=None) -> Job:
+    new_job_name = f"Job {next_job_number(project, 'Job')}"
 
     job, created = Job.objects.get_or_create(
-        project=project_image.project,
+        project=project,
         batch_id=batch_id,
         defaults={
             "name": f"{new_job_name}",
@@ -109,9 +222,37 @@ def assign_uploaded_image_to_batch(project_image, batch_id: Optional[str], user=
             "image_count": 0
         }
     )
+    return job
 
+def assign_uploaded_image_to_batch(project_image, batch_id: Optional[str], user=None):
+    if not batch_id:
+        return assign_image_to_available_job(project_image)  # Fallback for production
+
+    job = get_or_create_batch_job(project_image.project, batch_id, user=user)
     JobImage.objects.create(job=job, project_image=project_image)
-    job.image_count = JobImage.objects.filter(job=job).count()
-    job.save(update_fields=["image_count"])
+    refresh_job_counters([job.id])
+
+    return job
+
+def assign_uploaded_images_to_batch(project_images: List[ProjectImage], batch_id: Optional[str], user=None):
+    """
+    Assign several uploaded project images of one project at once.
+
+    With a batch id, the batch job is resolved once, the job images are written
+    with a single bulk insert and the job count is refreshed once. Without one,
+    the images are packed into open and new auto jobs.
+    """
+    if not project_images:
+        return None
+
+    if not batch_id:
+        return assign_images_to_available_jobs(project_images)  # Fallback for production
+
+    job = get_or_create_batch_job(project_images[0].project, batch_id, user=user)
+    JobImage.objects.bulk_create(
+        [JobImage(job=job, project_image=project_image) for project_image in project_images],
+        ignore_conflicts=True,
+    )
+    refresh_job_counters([job.id])
 
-    return job
\ No newline at end of file
+    return job
@@ -0,0 +1,67 @@
+import json
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+from django.db.models import Q, QuerySet
+
+
+def encode_cursor(timestamp: datetime, pk: int) -> str:
+    """Opaque cursor pointing after the row with this (timestamp, id)."""
+    payload = json.dumps([timestamp.isoformat(), pk], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of `encode_cursor`; raises ValueError for a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), int(pk)
+    except Exception as err:
+        raise ValueError(f"Invalid cursor: {cursor}") from err
+
+
+def _resolve(obj, path: str):
+    for attr in path.split("__"):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def keyset_page(
+    queryset: QuerySet,
+    cursor: Optional[str],
+    limit: int,
+    timestamp_field: str,
+    id_field: str = "id",
+) -> Tuple[List, Optional[str]]:
+    """
+    Return one page of `queryset`, newest first, and the cursor of the next page.
+
+    Rows are ordered by (timestamp_field, id_field) descending and the page
+    starts strictly after the cursor row, so the cost of a page does not grow
+    with its depth the way OFFSET does.
+
+    Args:
+        queryset (QuerySet): Filtered rows; any existing ordering is replaced.
+        cursor (Optional[str]): `next_cursor` of the previous page, None for the first page.
+        limit (int): Page size.
+        timestamp_field (str): Lookup path of the timestamp, e.g. "project_image__added_at".
+        id_field (str): Lookup path of the tie-breaking unique id.
+
+    Returns:
+        Tuple[List, Optional[str]]: Rows of the page and the next cursor, None on the last page.
+    """
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f"{timestamp_field}__lt": timestamp})
+            | Q(**{timestamp_field: timestamp, f"{id_field}__lt": pk})
+        )
+
+    rows = list(queryset.order_by(f"-{timestamp_field}", f"-{id_field}")[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(_resolve(last, timestamp_field), _resolve(last, id_field))
@@ -0,0 +1,52 @@
+import os
+from typing import Dict
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from projects.models import Project, ProjectImage
+
+PROJECT_STATUS_COUNTS_TIMEOUT = int(os.getenv("PROJECT_STATUS_COUNTS_TIMEOUT", 300))
+
+
+def project_status_counts_key(project_id: int) -> str:
+    return f"project_status_counts_{project_id}"
+
+
+def get_project_status_counts(project: Project) -> Dict[str, int]:
+    """
+    Number of active images of a project per status, plus their `total`.
+
+    Served from the cache; on a miss the counts come from a single GROUP BY
+    over the project's images. Status transitions invalidate the entry
+    through `invalidate_project_status_counts`; the timeout bounds staleness
+    for writers that do not.
+    """
+    key = project_status_counts_key(project.id)
+    counts = cache.get(key)
+    if counts is not None:
+        return counts
+
+    counts = {status: 0 for status, _ in ProjectImage.STATUS_CHOICES}
+    for row in (
+        ProjectImage.objects
+        .filter(project=project, is_active=True)
+        .order_by()
+        .values("status")
+        .annotate(count=Count("id"))
+    ):
+        counts[row["status"]] = row["count"]
+    counts["total"] = sum(counts.values())
+
+    cache.set(key, counts, timeout=PROJECT_STATUS_COUNTS_TIMEOUT)
+    return counts
+
+
+def invalidate_project_status_counts(*project_ids: int):
+    """
+    Drop the cached status counts of projects whose images were added or changed status.
+
+    Deferred to the commit of the current transaction, if any, so a concurrent
+    read cannot cache the counts from before the change.
+    """
+    keys = [project_status_counts_key(project_id) for project_id in project_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
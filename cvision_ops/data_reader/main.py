@@ -6,6 +6,7 @@ import importlib
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from data_reader.routers.images import endpoint
+from event_api.config import celery_utils
 
 ROUTERS_DIR = os.path.dirname(__file__) + "/routers"
 ROUTERS = [
@@ -46,6 +47,8 @@ def create_app() -> FastAPI:
         expose_headers=["X-Request-ID", "X-Progress-ID", "x-response-time"],
     )
 
+    app.celery_app = celery_utils.create_celery()
+
     for R in ROUTERS:
         try:
             module = importlib.import_module(R)
@@ -32,6 +32,8 @@ from annotations.models import (
     AnnotationGroup,
     AnnotationType
 )
+from common_utils.jobs.utils import refresh_project_image_jobs
+from common_utils.projects.utils import invalidate_project_status_counts
 
 
 def xyxy2xywh(xyxy):
@@ -121,6 +123,8 @@ def save_annotations(project_id: str, image_id: str, request: AnnotationData):
                     project_image.annotated = True
                     project_image.status = "annotated"
                     project_image.save(update_fields=["annotated", "status"])
+                    refresh_project_image_jobs([project_image.id])
+                    invalidate_project_status_counts(project_image.project_id)
                     
                 return {"message": "Annotations created successfully."}
             
@@ -140,6 +144,8 @@ def save_annotations(project_id: str, image_id: str, request: AnnotationData):
                 project_image.annotated = True
                 project_image.status = "annotated"
                 project_image.save(update_fields=["annotated", "status"])
+                refresh_project_image_jobs([project_image.id])
+                invalidate_project_status_counts(project_image.project_id)
 
             return {"message": "Annotations updated successfully.", "status": project_image.annotated}
         
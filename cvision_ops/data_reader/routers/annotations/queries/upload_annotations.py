@@ -21,6 +21,8 @@ from pydantic import BaseModel
 
 
 from common_utils.data.annotation.raw import save_annotations
+from common_utils.jobs.utils import refresh_project_image_jobs
+from common_utils.projects.utils import invalidate_project_status_counts
 
 from images.models import Image
 from projects.models import (
@@ -119,6 +121,8 @@ def upload_raw_annotations(response: Response, request: ApiRequest = Depends()):
             project_image.annotated = True
             project_image.status = "annotated"
             project_image.save()
+            refresh_project_image_jobs([project_image.id])
+            invalidate_project_status_counts(project_image.project_id)
         
     except HTTPException as e:
         results['error'] = {
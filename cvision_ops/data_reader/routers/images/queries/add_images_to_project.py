@@ -11,7 +11,8 @@ from typing import Callable
 from django.core.exceptions import ObjectDoesNotExist
 from images.models import Image
 from projects.models import Project, ProjectImage
-from common_utils.jobs.utils import assign_uploaded_image_to_batch
+from common_utils.jobs.utils import assign_uploaded_images_to_batch
+from common_utils.projects.utils import invalidate_project_status_counts
 
 
 class TimedRoute(APIRoute):
@@ -57,25 +58,26 @@ def add_images_to_project(project_id: int, request: AddImagesRequest):
 
     # Transactional bulk creation
     with transaction.atomic():
-        created_links = []
-        for image in images:
-            # Check if already linked
-            if ProjectImage.objects.filter(project=project, image=image).exists():
-                continue
-            project_image = ProjectImage(
+        # Skip images already linked
+        linked = set(
+            ProjectImage.objects.filter(project=project, image__in=images).values_list("image_id", flat=True)
+        )
+        created_links = [
+            ProjectImage(
                 project=project,
                 image=image,
                 status='unannotated'
             )
-            created_links.append(project_image)
+            for image in images
+            if image.id not in linked
+        ]
         
         ProjectImage.objects.bulk_create(created_links)
+        invalidate_project_status_counts(project.id)
 
-        batch_id = str(uuid.uuid4())
-        for project_image in created_links:
-            assign_uploaded_image_to_batch(
-                project_image=project_image,
-                batch_id=batch_id
-            )
+        assign_uploaded_images_to_batch(
+            project_images=created_links,
+            batch_id=str(uuid.uuid4())
+        )
 
     return {"message": f"{len(created_links)} image(s) added to project {project.name}."}
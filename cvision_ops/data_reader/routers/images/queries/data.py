@@ -9,7 +9,7 @@ from django.db.models import Q, Count
 from datetime import datetime, timedelta
 from datetime import time as dtime
 from datetime import date, timezone
-from typing import Callable, Optional, Dict, AnyStr, Any, List
+from typing import Callable, Optional, Dict, AnyStr, Any, List, Literal
 from fastapi import Request
 from fastapi import Response
 from fastapi import APIRouter
@@ -28,6 +28,7 @@ from tenants.models import (
 )
 
 from django.db.models import Prefetch
+from common_utils.pagination.core import keyset_page
 from annotations.models import Annotation
 
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
@@ -76,6 +77,8 @@ def list_tagged_images(
     source: str = Query(None),
     tag: str = Query(None),
     query: Optional[List[str]] = Query(None),
+    pagination: Literal["offset", "cursor"] = Query("offset", description="'cursor' pages with `cursor` instead of `offset`"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page in cursor pagination"),
 ):
     queryset = (
         Image.objects.prefetch_related(
@@ -149,7 +152,14 @@ def list_tagged_images(
 
     queryset = queryset.distinct()
     total_count = queryset.count()
-    paginated = queryset[offset:offset + limit]
+    next_cursor = None
+    if pagination == "cursor":
+        try:
+            paginated, next_cursor = keyset_page(queryset, cursor, limit, timestamp_field="created_at")
+        except ValueError as err:
+            raise HTTPException(status_code=400, detail=str(err))
+    else:
+        paginated = queryset[offset:offset + limit]
     results = []
 
     for image in paginated:
@@ -186,10 +196,13 @@ def list_tagged_images(
             "annotation_classes": list(annotation_classes),
         })
 
-    return {
+    payload = {
         "total": total_count,
         "limit": limit,
         "offset": offset,
         "query": query,
         "data": results
-    }
\ No newline at end of file
+    }
+    if pagination == "cursor":
+        payload["next_cursor"] = next_cursor
+    return payload
\ No newline at end of file
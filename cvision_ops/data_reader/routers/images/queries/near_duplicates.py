@@ -0,0 +1,70 @@
+import time
+import django
+django.setup()
+from typing import Callable
+from fastapi import Request
+from fastapi import Response
+from fastapi import APIRouter
+from fastapi import Query
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+from images.models import Image
+from projects.models import Project
+from common_utils.data.image.dedup import list_near_duplicates
+from common_utils.data.image.fingerprint import PERCEPTUAL_HASH_BANDS
+
+
+class TimedRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+        async def custom_route_handler(request: Request) -> Response:
+            before = time.time()
+            response: Response = await original_route_handler(request)
+            duration = time.time() - before
+            response.headers["X-Response-Time"] = str(duration)
+            print(f"route duration: {duration}")
+            print(f"route response: {response}")
+            print(f"route response headers: {response.headers}")
+            return response
+
+        return custom_route_handler
+
+
+router = APIRouter(
+    route_class=TimedRoute,
+)
+
+
+@router.api_route(
+    "/images/{image_id}/near-duplicates", methods=["GET"], tags=["Images"]
+)
+def get_near_duplicates(
+    image_id: str,
+    project_id: str = Query(..., description="Project whose images are searched"),
+    max_distance: int = Query(PERCEPTUAL_HASH_BANDS - 1, ge=0, le=PERCEPTUAL_HASH_BANDS - 1, description="Maximum Hamming distance of the perceptual hashes"),
+    ):
+    """
+    List the images of a project that are near-duplicates of an image.
+
+    Uses the perceptual hash recorded at ingest; images ingested without one
+    (IMAGE_NEAR_DUPLICATE_DISTANCE disabled) are not matched.
+    """
+    image = Image.objects.filter(image_id=image_id).first()
+    if not image:
+        raise HTTPException(status_code=404, detail=f"Image {image_id} not found")
+
+    project = Project.objects.filter(name=project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
+
+    return {
+        'image_id': image.image_id,
+        'data': [
+            {
+                'image_id': duplicate.image_id,
+                'image_name': duplicate.image_name,
+                'distance': distance,
+            }
+            for duplicate, distance in list_near_duplicates(project, image, max_distance=max_distance)
+        ],
+    }
@@ -24,6 +24,8 @@ from pathlib import Path
 from pydantic import BaseModel
 
 from images.models import Image
+from common_utils.export.archive import LazyZipFile, EXPORT_ZIP_COMPRESSION
+from common_utils.export.fetch import BlobFetcher
 from .data import parse_query_list
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
@@ -114,30 +116,20 @@ def stream_filtered_images_as_zip(
         Given a queryset of Image objects, return a streaming zip generator.
         Uses zipstream for low-memory, efficient zip creation.
         """
-        z = zipstream.ZipFile(mode='w', compression=zipstream.ZIP_DEFLATED, allowZip64=True)
-
-        for image in queryset:
-            image_path = image.image_file.name
-
-            if not default_storage.exists(image_path):
-                continue
-            
-            print(image_path)
-            arcname = f"{image.image_name or image.image_id}{os.path.splitext(image_path)[-1]}"
-
-            def file_iterator(path=image_path):
-                with default_storage.open(path, 'rb') as f:
-                    while True:
-                        chunk = f.read(8192)
-                        if not chunk:
-                            break
-                        yield chunk
-
-            try:
-                z.write_iter(arcname, file_iterator(image_path))
-            except Exception as e:
-                print(f"Error zipping image {image.image_id}: {e}")
-            
+        z = LazyZipFile(mode='w', compression=zipstream.ZIP_DEFLATED, allowZip64=True, compression_policy=EXPORT_ZIP_COMPRESSION)
+
+        def entries():
+            for image, data in BlobFetcher().fetch(queryset, path=lambda image: image.image_file.name):
+                image_path = image.image_file.name
+                if data is None:
+                    print(f"Error zipping image {image.image_id}: {image_path} not found")
+                    continue
+
+                print(image_path)
+                arcname = f"{image.image_name or image.image_id}{os.path.splitext(image_path)[-1]}"
+                yield arcname, [data], None
+
+        z.write_entries(entries())
         return z
 
     zip_filename = f"filtered_images_{queryset.count()}.zip"
@@ -22,6 +22,8 @@ from pydantic import BaseModel
 from django.conf import settings
 from common_utils.data.image.core  import save_image
 from common_utils.jobs.utils import assign_uploaded_image_to_batch
+from common_utils.data.image.ingest import ingest_images, spool_uploads, INGEST_PIPELINED, INGEST_DEFERRED
+from event_api.tasks import ingest_images as ingest_images_task
 
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
@@ -58,7 +60,9 @@ def upload_images(
     response: Response, 
     files: list[UploadFile] = File(...), 
     request: ApiRequest = Depends(),
-    batch_id: Optional[str] = Query(None)
+    batch_id: Optional[str] = Query(None),
+    pipelined: bool = Query(INGEST_PIPELINED),
+    deferred: bool = Query(INGEST_DEFERRED),
     ):
     results = {
         'status_code': 'ok',
@@ -77,8 +81,48 @@ def upload_images(
             response.status_code = status.HTTP_400_BAD_REQUEST
             return results
             
+        if deferred and not request.image_id:
+            # Spool the raw bytes and let the ingest_images queue do the rest.
+            pending = spool_uploads(
+                files=files,
+                project_id=request.project_id,
+                source=request.source_of_origin,
+                meta_info=request.model_dump(),
+                batch_id=batch_id,
+            )
+            ingest_images_task.core.execute.apply_async(args=([row.upload_id for row in pending],))
+            results['status_code'] = 'accepted'
+            results['status_description'] = f'{len(pending)} images queued for ingestion'
+            results['details'] = [
+                {
+                    'filename': row.filename,
+                    'status': row.status,
+                    'upload_id': row.upload_id,
+                    'image_id': row.image_id,
+                }
+                for row in pending
+            ]
+            response.status_code = status.HTTP_202_ACCEPTED
+            return results
+
         failed_images = []
         saved_images = []
+        if pipelined and not request.image_id:
+            for result in ingest_images(
+                files=files,
+                project_id=request.project_id,
+                source=request.source_of_origin,
+                meta_info=request.model_dump(),
+                batch_id=batch_id,
+            ):
+                if result['status'] != 'success':
+                    failed_images.append(result)
+                    continue
+
+                results['details'].append(result)
+                saved_images.append(result['filename'])
+            files = []
+
         for file in files:
             try:
                 success, result = save_image(
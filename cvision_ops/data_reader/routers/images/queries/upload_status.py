@@ -0,0 +1,64 @@
+import time
+import django
+django.setup()
+from typing import Callable, List
+from fastapi import Request
+from fastapi import Response
+from fastapi import APIRouter
+from fastapi import Query
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+from images.models import PendingImageUpload
+
+
+class TimedRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+        async def custom_route_handler(request: Request) -> Response:
+            before = time.time()
+            response: Response = await original_route_handler(request)
+            duration = time.time() - before
+            response.headers["X-Response-Time"] = str(duration)
+            print(f"route duration: {duration}")
+            print(f"route response: {response}")
+            print(f"route response headers: {response.headers}")
+            return response
+
+        return custom_route_handler
+
+
+router = APIRouter(
+    route_class=TimedRoute,
+)
+
+
+@router.api_route(
+    "/images/uploads", methods=["GET"], tags=["Images"]
+)
+def get_upload_status(
+    upload_ids: List[str] = Query(..., description="Upload ids returned by a deferred POST /images"),
+    ):
+    """
+    Poll deferred image uploads.
+
+    **Response:**
+      - One entry per known upload id with its `status` (pending, processing, done or failed),
+        the `image_id` and, for failed uploads, the `reason`.
+    """
+    rows = PendingImageUpload.objects.filter(upload_id__in=upload_ids).only(
+        "upload_id", "filename", "image_id", "status", "reason"
+    )
+    details = [
+        {
+            'upload_id': row.upload_id,
+            'filename': row.filename,
+            'status': row.status,
+            'image_id': row.image_id,
+            'reason': row.reason,
+        }
+        for row in rows
+    ]
+    if not details:
+        raise HTTPException(status_code=404, detail="Uploads not found")
+
+    return {'details': details}
@@ -3,7 +3,7 @@ import math
 import json
 import django
 import time
-from typing import Optional
+from typing import Optional, Literal
 from fastapi import APIRouter, Depends, Path, Query, HTTPException, Response
 from pydantic import BaseModel
 from django.db.models import Count, Q
@@ -12,6 +12,7 @@ from fastapi.routing import APIRoute
 from projects.models import ProjectImage
 from jobs.models import Job, JobImage
 from annotations.models import Annotation
+from common_utils.pagination.core import keyset_page
 from data_reader.routers.auth.queries.dependencies import get_current_user
 
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
@@ -52,6 +53,8 @@ def get_job_images(
     user_filters: Optional[str] = Query(None),
     items_per_page: int = 50,
     page: int = 1,
+    pagination: Literal["page", "cursor"] = Query("page", description="'cursor' pages with `cursor` instead of `page`"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page in cursor pagination"),
 ):
     try:
         job = Job.objects.select_related("project").filter(id=job_id).first()
@@ -95,7 +98,16 @@ def get_job_images(
         total_images = queryset.count()
 
         data = []
-        paginated = queryset[(page - 1) * items_per_page: page * items_per_page]
+        next_cursor = None
+        if pagination == "cursor":
+            try:
+                paginated, next_cursor = keyset_page(
+                    queryset, cursor, items_per_page, timestamp_field="project_image__added_at"
+                )
+            except ValueError as err:
+                raise HTTPException(status_code=400, detail=str(err))
+        else:
+            paginated = queryset[(page - 1) * items_per_page: page * items_per_page]
         for ji in paginated:
             pi = ji.project_image
             annotations = Annotation.objects.filter(project_image=pi, is_active=True)
@@ -121,7 +133,7 @@ def get_job_images(
             })
 
         job_image_ids = JobImage.objects.filter(job=job).values_list("project_image_id", flat=True)
-        return {
+        results = {
             "total_record": total_images,
             "pages": math.ceil(total_images / items_per_page),
             "unannotated": ProjectImage.objects.filter(id__in=job_image_ids, status="unannotated", is_active=True).count(),
@@ -130,6 +142,12 @@ def get_job_images(
             "user_filters": str(filters_dict),
             "data": data,
         }
+        if pagination == "cursor":
+            results["next_cursor"] = next_cursor
+        return results
+
+    except HTTPException:
+        raise
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
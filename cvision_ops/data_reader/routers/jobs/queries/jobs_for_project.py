@@ -2,7 +2,6 @@ import time
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Optional
 from pydantic import BaseModel
-from django.db.models import Count, Q
 from users.models import CustomUser as User
 from projects.models import Project
 from jobs.models import Job
@@ -66,12 +65,6 @@ def get_jobs_for_project(
         jobs = (
             Job.objects.filter(project__name=project_id)
                 .select_related("assignee")
-                .annotate(
-                    total=Count("images"),
-                    annotated=Count("images", filter=Q(images__project_image__status="annotated")),
-                    reviewed=Count("images", filter=Q(images__project_image__status="reviewed")),
-                    completed=Count("images", filter=Q(images__project_image__status="dataset")),
-                )
                 .order_by('-created_at')
             )
     except Project.DoesNotExist:
@@ -93,10 +86,10 @@ def get_jobs_for_project(
             createdAt=job.created_at.isoformat(),
             updatedAt=job.updated_at.isoformat(),
             progress=JobProgressOut(
-                total=job.total,
-                annotated=job.annotated,
-                reviewed=job.reviewed,
-                completed=job.completed,
+                total=job.image_count,
+                annotated=job.annotated_image_count,
+                reviewed=job.reviewed_image_count,
+                completed=job.dataset_image_count,
             )
         )
         for job in jobs
@@ -5,6 +5,7 @@ from typing import List, Optional
 from pydantic import BaseModel
 
 from jobs.models import Job, JobImage
+from common_utils.jobs.utils import refresh_job_counters
 from users.models import CustomUser as User
 from data_reader.routers.auth.queries.dependencies import job_project_editor_or_admin_dependency
 
@@ -54,6 +55,7 @@ def split_job_into_slices(
             JobImage(job=job_slice, project_image=ji.project_image)
             for ji in slice_images
         ])
+        refresh_job_counters([job_slice.id])
 
     # Optionally: delete the original job or mark it as sliced
     job.status = "sliced"
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from users.models import CustomUser as User
 from organizations.models import Organization
 from memberships.models import OrganizationMembership
-from jobs.models import Job, JobImage
+from jobs.models import Job
 from pydantic import BaseModel
 from typing import Optional
 from fastapi import Path
@@ -28,28 +28,34 @@ def fetch_user_progress(
     ).select_related("user", "role")
 
 
+    # One read of the maintained job counters for all members.
+    jobs_by_user = {}
+    for job in Job.objects.filter(
+        assignee_id__in=[m.user_id for m in memberships]
+    ).order_by('created_at'):
+        jobs_by_user.setdefault(job.assignee_id, []).append(job)
+
     data = []
     for m in memberships:
-        jobs = Job.objects.filter(assignee=m.user).order_by('created_at')
+        jobs = jobs_by_user.get(m.user_id)
         if not jobs:
             continue
         
         assigned_jobs = []
         image_count, annotated_images, reviewed_images, completed_images = 0, 0, 0, 0
         for job in jobs:
-            project_images = JobImage.objects.filter(job=job, project_image__is_active=True)
-            image_count += project_images.count()
-            annotated_images += project_images.filter(project_image__status="annotated").count()
-            reviewed_images += project_images.filter(project_image__status="reviewed").count()
-            completed_images += project_images.filter(project_image__status="dataset").count()
+            image_count += job.total_images
+            annotated_images += job.annotated_images
+            reviewed_images += job.reviewed_images
+            completed_images += job.dataset_images
             assigned_jobs.append(
                 {
                     "jobId": f"{job.id}",
                     "jobName": f"{job.name}",
-                    "totalImages": project_images.count(),
-                    "annotatedImages": project_images.filter(project_image__status="annotated").count(),
-                    "reviewedImages": project_images.filter(project_image__status="reviewed").count(),
-                    "completedImages": project_images.filter(project_image__status="dataset").count(),
+                    "totalImages": job.total_images,
+                    "annotatedImages": job.annotated_images,
+                    "reviewedImages": job.reviewed_images,
+                    "completedImages": job.dataset_images,
                 }
             )
         
@@ -63,8 +69,8 @@ def fetch_user_progress(
             "annotatedImages": annotated_images,
             "reviewedImages": reviewed_images,
             "completedImages": completed_images,
-            "progressPercentage": round((completed_images / image_count) * 100, 2),
-            "lastUpdated": jobs.last().updated_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "progressPercentage": round((completed_images / image_count) * 100, 2) if image_count else 0,
+            "lastUpdated": jobs[-1].updated_at.strftime("%Y-%m-%d %H:%M:%S"),
             "assignedJobs": assigned_jobs
 
         })
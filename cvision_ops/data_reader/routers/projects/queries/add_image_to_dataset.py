@@ -10,6 +10,8 @@ from projects.models import (
     Project, 
     ProjectImage,
 )
+from common_utils.jobs.utils import refresh_project_image_jobs
+from common_utils.projects.utils import invalidate_project_status_counts
 
 class TimedRoute(APIRoute):
     def get_route_handler(self) -> Callable:
@@ -51,14 +53,21 @@ def finalize_images(project_id: str, image_id: Optional[str]=None):
 
             project_image.status = "dataset"
             project_image.finalized = True
-            project_image.save()
+            with transaction.atomic():
+                project_image.save()
+                refresh_project_image_jobs([project_image.id])
+                invalidate_project_status_counts(project.id)
             return {"message": f"Image marked as {project_image.status}"}
         
         project_images =  ProjectImage.objects.filter(project=project, status="reviewed")   
         if not project_images:
             raise HTTPException(status_code=404, detail="Image not found in project")
 
-        project_images.update(status="dataset", finalized=True)
+        with transaction.atomic():
+            project_image_ids = [project_image.id for project_image in project_images]
+            project_images.update(status="dataset", finalized=True)
+            refresh_project_image_jobs(project_image_ids)
+            invalidate_project_status_counts(project.id)
         return {"message": f"{len(project_images)} Images marked as Dataset (Final)!"}
 
     except Exception as e:
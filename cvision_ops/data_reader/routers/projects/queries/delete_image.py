@@ -10,6 +10,8 @@ from projects.models import (
     Project, 
     ProjectImage,
 )
+from common_utils.jobs.utils import refresh_project_image_jobs
+from common_utils.projects.utils import invalidate_project_status_counts
 
 class TimedRoute(APIRoute):
     def get_route_handler(self) -> Callable:
@@ -48,7 +50,10 @@ def delete_image(project_id: str, image_id:str):
         project_image.is_active = False
         project_image.reviewed = True
         project_image.status = "reviewed"
-        project_image.save(update_fields=["reviewed", "status", "is_active"])
+        with transaction.atomic():
+            project_image.save(update_fields=["reviewed", "status", "is_active"])
+            refresh_project_image_jobs([project_image.id])
+            invalidate_project_status_counts(project.id)
 
         return {"message": f"Image marked as inactive", "success": True}
 
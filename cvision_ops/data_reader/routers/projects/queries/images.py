@@ -6,11 +6,11 @@ import json
 import django
 import shutil
 django.setup()
-from django.db.models import Q, Count
+from django.db.models import Q, Count, Prefetch
 from datetime import datetime, timedelta
 from datetime import time as dtime
 from datetime import date, timezone
-from typing import Callable, Optional, Dict, AnyStr, Any
+from typing import Callable, Optional, Dict, AnyStr, Any, Literal
 from fastapi import Request
 from fastapi import Response
 from fastapi import APIRouter
@@ -36,6 +36,8 @@ from projects.models import (
 from annotations.models import (
     Annotation
 )
+from common_utils.projects.utils import get_project_status_counts
+from common_utils.pagination.core import keyset_page
 
 
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
@@ -95,6 +97,8 @@ def get_project_images(
     user_filters: Optional[str] = Query(None),
     items_per_page:int=50,
     page:int=1,
+    pagination: Literal["page", "cursor"] = Query("page", description="'cursor' pages with `cursor` instead of `page`"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page in cursor pagination"),
     ):
     results = {}
     try:
@@ -126,12 +130,14 @@ def get_project_images(
             page = 1    
         
         
-        queryset = ProjectImage.objects.annotate(
-            annotation_count=Count(
-                "annotations", 
-                filter=Q(annotations__is_active=True)
+        queryset = ProjectImage.objects.all()
+        if "annotation_count" in filters_dict:
+            queryset = queryset.annotate(
+                annotation_count=Count(
+                    "annotations", 
+                    filter=Q(annotations__is_active=True)
+                    )
                 )
-            )
         
         lookup_filters = Q()
         lookup_filters &= Q(project=project)
@@ -147,9 +153,35 @@ def get_project_images(
                 lookup_filters &= Q(filter_map) 
         
         images = queryset.filter(lookup_filters).order_by("-added_at").distinct()
+        page_images = (
+            images
+            .select_related("project", "image__sensorbox__edge_box__plant")
+            .prefetch_related(
+                Prefetch(
+                    "annotations",
+                    queryset=Annotation.objects.filter(is_active=True).select_related("annotation_class"),
+                    to_attr="active_annotations",
+                )
+            )
+        )
+        next_cursor = None
+        if pagination == "cursor":
+            try:
+                rows, next_cursor = keyset_page(page_images, cursor, items_per_page, timestamp_field="added_at")
+            except ValueError as err:
+                results['error'] = {
+                    'status_code': 'bad-request',
+                    'status_description': 'Invalid cursor',
+                    'detail': str(err),
+                }
+                response.status_code = http_status.HTTP_400_BAD_REQUEST
+                return results
+        else:
+            rows = page_images[(page - 1) * items_per_page:page * items_per_page]
+
         data = []
-        for image in images[(page - 1) * items_per_page:page * items_per_page]:
-            annotation = Annotation.objects.filter(project_image=image, is_active=True)
+        for image in rows:
+            annotation = image.active_annotations
             data.append(
                 {
                     'project_id': image.project.name,
@@ -173,16 +205,19 @@ def get_project_images(
                 }              
             )
             
-        total_record = len(images)
+        total_record = images.count()
+        status_counts = get_project_status_counts(project)
         results = {
             "total_record": total_record,
             "pages": math.ceil(total_record / items_per_page),
-            'unannotated': len(ProjectImage.objects.filter(project=project, status="unannotated", is_active=True)),
-            'annotated': len(ProjectImage.objects.filter(project=project, status="annotated", is_active=True)),
-            'reviewed': len(ProjectImage.objects.filter(project=project, status="reviewed", is_active=True)),
+            'unannotated': status_counts["unannotated"],
+            'annotated': status_counts["annotated"],
+            'reviewed': status_counts["reviewed"],
             "user_filters": lookup_filters,
             'data': data,
         }
+        if pagination == "cursor":
+            results["next_cursor"] = next_cursor
     
     except HTTPException as e:
         results['error'] = {
@@ -10,6 +10,8 @@ from projects.models import (
     Project, 
     ProjectImage,
 )
+from common_utils.jobs.utils import refresh_project_image_jobs
+from common_utils.projects.utils import invalidate_project_status_counts
 
 class TimedRoute(APIRoute):
     def get_route_handler(self) -> Callable:
@@ -51,7 +53,10 @@ def mark_image_as_null(project_id: str, image_id: Optional[str]=None, marked_as_
             else:
                 project_image.status = "annotated"
 
-            project_image.save()
+            with transaction.atomic():
+                project_image.save()
+                refresh_project_image_jobs([project_image.id])
+                invalidate_project_status_counts(project.id)
             return {"message": f"Image marked as null", "success": True}
         
         
@@ -59,7 +64,11 @@ def mark_image_as_null(project_id: str, image_id: Optional[str]=None, marked_as_
         if not project_images:
             raise HTTPException(status_code=404, detail="Image not found in project")
 
-        project_images.update(status="reviewed", reviewed=True, marked_as_null=True)
+        with transaction.atomic():
+            project_image_ids = [project_image.id for project_image in project_images]
+            project_images.update(status="reviewed", reviewed=True, marked_as_null=True)
+            refresh_project_image_jobs(project_image_ids)
+            invalidate_project_status_counts(project.id)
         return {"message": f"{len(project_images)} Images marked as Null!", "success": True}
 
     except Exception as e:
@@ -4,7 +4,8 @@ import json
 import zipfile
 import shutil
 import time
-from fastapi import APIRouter, HTTPException, status, Header
+from collections import deque
+from fastapi import APIRouter, HTTPException, status, Header, Query
 from datetime import datetime
 from typing import Callable, Optional
 from fastapi import Request
@@ -26,7 +27,9 @@ from projects.models import (
 from annotations.models import Annotation
 from augmentations.models import VersionImageAugmentation
 from common_utils.azure_manager.core import AzureManager
-from common_utils.augmentation.core import AugmentationPipeline, PREDEFINED_AUGMENTATIONS
+from common_utils.augmentation.core import PREDEFINED_AUGMENTATIONS
+from common_utils.augmentation.engine import AugmentationEngine
+from common_utils.augmentation.lazy import lazy_parameters, LAZY_AUGMENTATION_NAME, VERSION_LAZY_AUGMENTATION
 from common_utils.progress.core import track_progress
 
 class TimedRoute(APIRoute):
@@ -56,10 +59,14 @@ router = APIRouter(
 def create_version(
     response:Response,
     project_id: str,
+    lazy_augmentation: bool = Query(VERSION_LAZY_AUGMENTATION, description="Store seeded augmentation policies and generate the samples at export time"),
     x_request_id: Annotated[Optional[str], Header()] = None,
     ):
     """
     Create a new version for a project by associating all reviewed images with the version.
+
+    With `lazy_augmentation`, only the seeded policy of each train image is stored;
+    its augmented samples are produced when the version is exported.
     """
     try:
         task_id = x_request_id if x_request_id else str(uuid.uuid4())
@@ -108,49 +115,82 @@ def create_version(
         if not PREDEFINED_AUGMENTATIONS:
             return {"message": f"Version v{next_version_number} created successfully", "version_id": new_version.id, "version_number": new_version.version_number}
         
-        output_dir = f"/tmp/augmented_dataset/{new_version.id}"
-        aug_pipeline = AugmentationPipeline(output_dir=output_dir)
-        for i, vi in enumerate(new_version.version_images.all()):
-            proj_img = vi.project_image
-            if proj_img.marked_as_null or proj_img.mode.mode.lower() != "train":
-                track_progress(task_id=task_id, percentage=round((i / new_version.version_images.count()) * 100), status="Generating Images")
-                continue
-
-            image_field = proj_img.image.image_file.name
-            cv_image = AzureManager.download_image_from_azure(image_field)
-
-            print('annotation')
-            ann_qs = Annotation.objects.filter(project_image=proj_img, is_active=True)
-            ann_dict = {
-                "bboxes": [ann.data for ann in ann_qs],
-                "labels": [ann.annotation_class.class_id for ann in ann_qs]
-            }
-            augmented_files = aug_pipeline.apply_augmentations_policy(
-                image=cv_image,
-                annotations=ann_dict,
-                annotation_type="detection",
-                file_name_prefix=os.path.basename(proj_img.image.image_file.name),
-                user_selected_augmentations=PREDEFINED_AUGMENTATIONS,
-                multiplier=3,
-            )
+        version_images = list(new_version.version_images.select_related("project_image__mode", "project_image__image"))
+        total = len(version_images)
 
-            for aug in augmented_files:
-                aug_image_path = aug["image"]
-                aug_annotation_path = aug["label"]
+        if lazy_augmentation:
+            VersionImageAugmentation.objects.bulk_create([
+                VersionImageAugmentation(
+                    version_image=vi,
+                    augmentation_name=LAZY_AUGMENTATION_NAME,
+                    parameters=lazy_parameters(
+                        PREDEFINED_AUGMENTATIONS,
+                        file_name_prefix=os.path.basename(vi.project_image.image.image_file.name),
+                        multiplier=3,
+                    ),
+                )
+                for vi in version_images
+                if not vi.project_image.marked_as_null and vi.project_image.mode.mode.lower() == "train"
+            ])
+            track_progress(task_id=task_id, percentage=100, status="Completed")
+            return {"message": f"Version v{next_version_number} created successfully", "version_id": new_version.id, "version_number": new_version.version_number}
 
-                aug_url = AzureManager.upload_image_to_azure(
-                    local_file_path=aug_image_path, 
-                    azure_path=f"versions/augmentations/{os.path.basename(aug_image_path)}")
+        output_dir = f"/tmp/augmented_dataset/{new_version.id}"
+
+        def record_augmentations(vi, augmented_files):
+            for sample in augmented_files:
+                azure_path = f"versions/augmentations/{sample.name}.jpg"
+                if sample.image_path:
+                    aug_url = AzureManager.upload_image_to_azure(local_file_path=sample.image_path, azure_path=azure_path)
+                    os.remove(sample.image_path)
+                else:
+                    aug_url = AzureManager.upload_bytes_to_azure(data=sample.image_bytes, azure_path=azure_path)
                 
                 VersionImageAugmentation.objects.create(
                     version_image=vi,
                     augmentation_name="custom",
                     parameters=PREDEFINED_AUGMENTATIONS,
                     augmented_image_file=aug_url,
-                    augmented_annotation=json.load(open(aug_annotation_path, "r")) if os.path.exists(aug_annotation_path) else ""
+                    augmented_annotation=sample.annotation(),
                 )
-            
-            track_progress(task_id=task_id, percentage=round((i / new_version.version_images.count()) * 100), status="Generating Images")
+
+        # Images are augmented on the process-wide pool; at most 2 * workers are pending at once.
+        with AugmentationEngine(output_dir=output_dir) as aug_engine:
+            pending = deque()
+            max_pending = max(1, 2 * aug_engine.workers)
+            for i, vi in enumerate(version_images):
+                proj_img = vi.project_image
+                if proj_img.marked_as_null or proj_img.mode.mode.lower() != "train":
+                    track_progress(task_id=task_id, percentage=round((i / total) * 100), status="Generating Images")
+                    continue
+
+                image_field = proj_img.image.image_file.name
+                cv_image = AzureManager.download_image_from_azure(image_field)
+
+                ann_qs = Annotation.objects.filter(project_image=proj_img, is_active=True).select_related("annotation_class")
+                ann_dict = {
+                    "bboxes": [ann.data for ann in ann_qs],
+                    "labels": [ann.annotation_class.class_id for ann in ann_qs]
+                }
+                pending.append((vi, aug_engine.submit(
+                    cv_image,
+                    annotations=ann_dict,
+                    annotation_type="detection",
+                    file_name_prefix=os.path.basename(proj_img.image.image_file.name),
+                    user_selected_augmentations=PREDEFINED_AUGMENTATIONS,
+                    multiplier=3,
+                    in_memory=True,
+                )))
+
+                while len(pending) >= max_pending:
+                    pending_vi, future = pending.popleft()
+                    record_augmentations(pending_vi, future.result())
+                
+                track_progress(task_id=task_id, percentage=round((i / total) * 100), status="Generating Images")
+
+            while pending:
+                pending_vi, future = pending.popleft()
+                record_augmentations(pending_vi, future.result())
         
         shutil.rmtree(output_dir, ignore_errors=True)
         track_progress(task_id=task_id, percentage=100, status="Completed")
@@ -24,6 +24,11 @@ class BaseConfig:
     )
 
     CELERY_TASK_ROUTES = (route_task,)
+    # task modules not imported by any event_api router
+    CELERY_IMPORTS: tuple = (
+        "event_api.tasks.export_version.core",
+        "event_api.tasks.ingest_images.core",
+    )
     ACCEPT_CONTENT = ['json', 'pickle']
     TASK_SERIALIZE = 'pickle'
     RESULT_SERIALIZE = 'pickle'
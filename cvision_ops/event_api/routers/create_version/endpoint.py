@@ -19,8 +19,9 @@ from fastapi import HTTPException, status
 from fastapi.routing import APIRoute
 from typing_extensions import Annotated
 from fastapi import FastAPI, Depends, APIRouter, Request, Header, Response
-from typing import Callable, Union, Any, Dict, AnyStr, Optional, List
+from typing import Callable, Union, Any, Dict, AnyStr, Optional, List, Literal
 from projects.models import Project, Version, VersionImage, ProjectImage
+from common_utils.export.archive import EXPORT_ZIP_COMPRESSION
 
 from event_api.tasks import (
     create_version
@@ -50,6 +51,7 @@ class ApiResponse(BaseModel):
 
 class CreateVersionRequest(BaseModel):
     project_id: str
+    compression: Literal["auto", "deflate", "store"] = EXPORT_ZIP_COMPRESSION
 
 router = APIRouter(
     prefix="/api/v1",
@@ -101,7 +103,11 @@ def handle_event(
         VersionImage.objects.bulk_create(version_images)
 
     image_ids = list(VersionImage.objects.filter(version=new_version).values_list('id', flat=True))
-    task = create_version.core.execute.apply_async(args=(new_version.id, image_ids), task_id=x_request_id)
+    task = create_version.core.execute.apply_async(
+        args=(new_version.id, image_ids),
+        kwargs={"compression": payload.compression},
+        task_id=x_request_id,
+    )
     response_data = {
         "status": "success",
         "task_id": task.id,
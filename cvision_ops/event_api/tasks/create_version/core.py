@@ -1,13 +1,14 @@
 import os
 import cv2
+import json
 import shutil
 import zipfile
 import django
 django.setup()
 import logging
 import numpy as np
-from io import BytesIO
 import concurrent.futures
+from itertools import islice
 from pathlib import Path
 from celery import shared_task
 from django.core.cache import cache
@@ -16,7 +17,11 @@ from projects.models import Version, VersionImage
 from annotations.models import Annotation
 from django.core.files.storage import default_storage
 from common_utils.data.annotation.core import format_annotation
-from common_utils.augmentation.core import AugmentationPipeline
+from common_utils.augmentation.engine import AugmentationEngine
+from common_utils.augmentation.utils import decode_image
+from common_utils.export.archive import compress_type_for, EXPORT_ZIP_COMPRESSION
+
+CREATE_VERSION_MAX_IN_FLIGHT = int(os.getenv("CREATE_VERSION_MAX_IN_FLIGHT", 20))
 
 PREDEFINED_AUGMENTATIONS = [
     {"name": "horizontal_flip", "params": {"p": 0.5}},
@@ -28,24 +33,25 @@ PREDEFINED_AUGMENTATIONS = [
     {"name": "cutout", "params": {"num_holes_range": (1, 3), "hole_height_range": (100, 200), "hole_width_range": (100, 200), "fill": 0, "p": 1.0}}
 ]
 
-def decode_image(file_bytes):
-    """Convert file bytes into a cv2 image (BGR)"""
-    nparr = np.frombuffer(file_bytes, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    return img
-
 @shared_task(bind=True,autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={"max_retries": 5}, ignore_result=True,
              name='create_version:execute')
-def execute(self, version_id, image_ids, **kwargs):
+def execute(self, version_id, image_ids, compression=EXPORT_ZIP_COMPRESSION, **kwargs):
     try:
         version = Version.objects.get(id=version_id)
         total = len(image_ids)
         augmented_output_dir = Path("/tmp/augmented_dataset")
         augmented_output_dir.mkdir(parents=True, exist_ok=True)
-        aug_pipeline = AugmentationPipeline(output_dir=str(augmented_output_dir))
-        augmented_files = []
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
+        # Augmentation is CPU-bound: it runs on a process pool while the threads below do I/O.
+        aug_engine = AugmentationEngine(output_dir=str(augmented_output_dir))
+        zip_filename = f"{version.project.name}.v{version.version_number}.zip"
+        local_versions_dir = "/tmp/versions"
+        os.makedirs(local_versions_dir, exist_ok=True)
+        local_path = os.path.join(local_versions_dir, zip_filename)
+        partial_path = f"{local_path}.part"
+
+        # Entries are written straight to disk; at most CREATE_VERSION_MAX_IN_FLIGHT
+        # images are held in memory at any time.
+        with aug_engine, open(partial_path, "wb") as zip_file, zipfile.ZipFile(zip_file, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as zipf:
             def process_image(image_id):
                 version_image = VersionImage.objects.get(id=image_id)
                 prefix = version_image.project_image.mode.mode
@@ -66,62 +72,63 @@ def execute(self, version_id, image_ids, **kwargs):
                         "bboxes": [ann.data for ann in annotations],
                         "labels": [ann.annotation_class.class_id for ann in annotations]
                     }
-                    augmented_files = aug_pipeline.apply_augmentations_policy(
-                        image=cv_image,
+                    augmented_files = aug_engine.augment(
+                        cv_image,
                         annotations=ann_dict,
                         annotation_type="detection",
                         file_name_prefix=image_name,
                         user_selected_augmentations=PREDEFINED_AUGMENTATIONS,
                         multiplier=3,
+                        in_memory=True,
                     )
 
                 return (prefix, image_name, image_bytes, yolo_annotations, augmented_files)
 
             with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                future_to_image = {executor.submit(process_image, img_id): img_id for img_id in image_ids}
+                pending_ids = iter(image_ids)
+                in_flight = {executor.submit(process_image, img_id) for img_id in islice(pending_ids, CREATE_VERSION_MAX_IN_FLIGHT)}
                 processed = 0
-                for future in concurrent.futures.as_completed(future_to_image):
-                    try:
-                        prefix, image_name, image_bytes, yolo_annotations, augmented_files = future.result()
-                        zipf.writestr(f"{prefix}/images/{image_name}.jpg", image_bytes)
-                        zipf.writestr(f"{prefix}/labels/{image_name}.txt", yolo_annotations)
+                while in_flight:
+                    done, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        try:
+                            prefix, image_name, image_bytes, yolo_annotations, augmented_files = future.result()
+                            image_arcname = f"{prefix}/images/{image_name}.jpg"
+                            label_arcname = f"{prefix}/labels/{image_name}.txt"
+                            zipf.writestr(image_arcname, image_bytes, compress_type=compress_type_for(image_arcname, compression))
+                            zipf.writestr(label_arcname, yolo_annotations, compress_type=compress_type_for(label_arcname, compression))
 
-                        for aug_file in augmented_files:
-                            image_path = Path(aug_file['image'])
-                            label_path = Path(aug_file['label'])
-                            if not image_path.exists():
-                                continue
+                            for sample in augmented_files:
+                                aug_arcname = f"{prefix}/images/{sample.name}.jpg"
+                                aug_label_arcname = f"{prefix}/labels/{sample.name}.json"
+                                zipf.writestr(aug_arcname, sample.read_image(), compress_type=compress_type_for(aug_arcname, compression))
+                                zipf.writestr(aug_label_arcname, json.dumps(sample.annotation(), indent=4), compress_type=compress_type_for(aug_label_arcname, compression))
+                                if sample.image_path:
+                                    os.remove(sample.image_path)
 
-                            with open(image_path, "rb") as aug_f:
-                                aug_bytes = aug_f.read()
+                        except Exception as e:
+                            logging.error(f"Failed to zip file: {e}")
 
-                            zipf.writestr(f"{prefix}/images/{image_path.name}", aug_bytes)
-                            if label_path.exists():
-                                with open(label_path, "rb") as ann_f:
-                                    aug_ann_bytes = ann_f.read()
-                                zipf.writestr(f"{prefix}/labels/{label_path.name}", aug_ann_bytes)
+                        processed += 1
+                        cache.set(
+                            f"task_progress_{self.request.id}",
+                            {'current': processed, 'total': total, 'bytes_written': zip_file.tell()},
+                            timeout=3600,
+                        )
 
-                    except Exception as e:
-                        logging.error(f"Failed to zip file: {e}")
-                    
-                    processed += 1
-                    cache.set(f"task_progress_{self.request.id}", {'current': processed, 'total': total}, timeout=3600)
-        
-        zip_buffer.seek(0)
-        zip_filename = f"{version.project.name}.v{version.version_number}.zip"
+                        next_id = next(pending_ids, None)
+                        if next_id is not None:
+                            in_flight.add(executor.submit(process_image, next_id))
+
+        os.replace(partial_path, local_path)
+        bytes_written = os.path.getsize(local_path)
         # zip_path = default_storage.save(zip_filename, ContentFile(zip_buffer.getvalue()))
         # version.version_file = zip_path
         # version.save(update_fields=["version_file"])
 
-        local_versions_dir = "/tmp/versions"
-        os.makedirs(local_versions_dir, exist_ok=True)
-        local_path = os.path.join(local_versions_dir, zip_filename)
-        with open(local_path, "wb") as f:
-            f.write(zip_buffer.getvalue())
-
         shutil.rmtree(str(augmented_output_dir))
-        cache.set(f"task_progress_{self.request.id}", {'current': total, 'total': total, 'status': 'Completed'}, timeout=3600)
-        return {'current': total, 'total': total, 'status': 'Completed'}
+        cache.set(f"task_progress_{self.request.id}", {'current': total, 'total': total, 'bytes_written': bytes_written, 'status': 'Completed'}, timeout=3600)
+        return {'current': total, 'total': total, 'bytes_written': bytes_written, 'status': 'Completed'}
     
     except Exception as err:
         raise ValueError(f"Error saving delivery data into db: {err}")
\ No newline at end of file
@@ -0,0 +1,22 @@
+import django
+django.setup()
+from celery import shared_task
+from django.core.cache import cache
+from projects.models import Version
+from common_utils.progress.core import track_progress
+from common_utils.export.archive import EXPORT_ZIP_COMPRESSION
+from common_utils.export.core import export_version
+
+
+@shared_task(bind=True,autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={"max_retries": 5}, ignore_result=True,
+             name='export_version:execute')
+def execute(self, version_id, annotation_format, compression=EXPORT_ZIP_COMPRESSION, **kwargs):
+    try:
+        version = Version.objects.get(id=version_id)
+        url = export_version(version, annotation_format, task_id=self.request.id, compression=compression)
+        cache.set(f"task_result_{self.request.id}", {"url": url}, timeout=3600)
+        return {"url": url}
+
+    except Exception as err:
+        track_progress(task_id=self.request.id, percentage=0, status="Failed", message=str(err))
+        raise ValueError(f"Error exporting version {version_id}: {err}")
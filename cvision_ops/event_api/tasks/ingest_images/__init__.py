@@ -0,0 +1 @@
+from . import core
\ No newline at end of file
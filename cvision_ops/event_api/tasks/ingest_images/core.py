@@ -0,0 +1,22 @@
+import django
+django.setup()
+from celery import shared_task
+from common_utils.data.image.ingest import claim_pending_uploads, process_pending_uploads
+
+
+@shared_task(bind=True,autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={"max_retries": 5}, ignore_result=True,
+             name='ingest_images:execute')
+def execute(self, upload_ids=None, **kwargs):
+    """
+    Ingest spooled uploads: compress, read dimensions, upload to storage and assign to jobs.
+
+    Args:
+        upload_ids (list[str], optional): Pending uploads of one request; the oldest
+            pending uploads when None, to sweep rows whose dispatch was lost.
+    """
+    try:
+        rows = claim_pending_uploads(upload_ids)
+        return process_pending_uploads(rows)
+
+    except Exception as err:
+        raise ValueError(f"Error ingesting uploads {upload_ids}: {err}")
@@ -1,7 +1,7 @@
 
 from django.contrib import admin
 from unfold.admin import ModelAdmin, TabularInline
-from .models import Image, Tag, ImageTag
+from .models import Image, Tag, ImageTag, PendingImageUpload
 
 
 @admin.register(Tag)
@@ -25,4 +25,9 @@ class ImageAdmin(ModelAdmin):
 class ImageTagAdmin(ModelAdmin):
     list_display = ('image', 'tag', 'tagged_by', 'tagged_at')
     search_fields = ('image__image_name', 'tag__name', 'tagged_by__username')
-    autocomplete_fields = ['image', 'tag', 'tagged_by']
\ No newline at end of file
+    autocomplete_fields = ['image', 'tag', 'tagged_by']
+@admin.register(PendingImageUpload)
+class PendingImageUploadAdmin(ModelAdmin):
+    list_display = ('filename', 'status', 'project_name', 'batch_id', 'created_at', 'updated_at')
+    search_fields = ('filename', 'upload_id', 'image_id')
+    list_filter = ('status', 'created_at')
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.core.files.storage import default_storage
+from images.models import Image
+from common_utils.data.image.fingerprint import perceptual_hash
+from common_utils.data.image.dedup import perceptual_fields
+
+class Command(BaseCommand):
+    help = "Populate perceptual hashes of images stored before near-duplicate detection"
+
+    def handle(self, *args, **options):
+        updated = 0
+        errored = 0
+
+        qs = Image.objects.filter(perceptual_hash__isnull=True).only("id", "image_file")
+        self.stdout.write(f"Processing {qs.count()} images...")
+
+        # Content hashes are not backfilled: they cover the uploaded bytes, which
+        # are gone once the stored file has been re-encoded.
+        for img in qs.iterator(chunk_size=500):
+            try:
+                with default_storage.open(img.image_file.name, 'rb') as f:
+                    fields = perceptual_fields(perceptual_hash(f.read()))
+
+                for name, value in fields.items():
+                    setattr(img, name, value)
+                img.save(update_fields=list(fields))
+                updated += 1
+
+            except Exception as e:
+                self.stderr.write(f"❌ Error processing Image ID {img.id} ({img.image_file.name}): {e}")
+                errored += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Done: {updated} updated, {errored} failed"
+        ))
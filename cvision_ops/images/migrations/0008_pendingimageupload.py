@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0007_image_height_image_width'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingImageUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('upload_id', models.CharField(max_length=255, unique=True)),
+                ('filename', models.CharField(max_length=255)),
+                ('image_id', models.CharField(help_text='Image id reserved for (or already held by) the upload', max_length=255)),
+                ('spool_path', models.CharField(help_text='Raw upload bytes on the ingest host', max_length=1024)),
+                ('project_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('source_of_origin', models.CharField(blank=True, max_length=255, null=True)),
+                ('meta_info', models.JSONField(blank=True, null=True)),
+                ('batch_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('reason', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Pending Image Uploads',
+                'db_table': 'pending_image_upload',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='pending_upload_status_idx')],
+            },
+        ),
+    ]
@@ -17,6 +17,12 @@ class Image(models.Model):
     sensorbox = models.ForeignKey(SensorBox, on_delete=models.SET_NULL, null=True)  # New relationship
     width = models.PositiveIntegerField(null=True, blank=True, help_text="Original width in pixels")
     height = models.PositiveIntegerField(null=True, blank=True, help_text="Original height in pixels")
+    content_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True, help_text="SHA-256 of the uploaded file")
+    perceptual_hash = models.BigIntegerField(null=True, blank=True, help_text="64-bit difference hash, stored signed")
+    phash_band_0 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    phash_band_1 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    phash_band_2 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    phash_band_3 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
     tags = models.ManyToManyField(
         'Tag',
         through='ImageTag',
@@ -27,6 +33,9 @@ class Image(models.Model):
     class Meta:
         db_table = 'image'
         verbose_name_plural = 'Images'
+        indexes = [
+            models.Index(fields=['created_at'], name='image_created_at_idx'),
+        ]
         
     def __str__(self):
         return self.image_name
@@ -53,4 +62,35 @@ class ImageTag(models.Model):
         verbose_name_plural = 'Image Tags'
 
     def __str__(self):
-        return f"{self.image.image_name} - {self.tag.name}"
\ No newline at end of file
+        return f"{self.image.image_name} - {self.tag.name}"
+class PendingImageUpload(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    upload_id = models.CharField(max_length=255, unique=True)
+    filename = models.CharField(max_length=255)
+    image_id = models.CharField(max_length=255, help_text="Image id reserved for (or already held by) the upload")
+    spool_path = models.CharField(max_length=1024, help_text="Raw upload bytes on the ingest host")
+    content_hash = models.CharField(max_length=64, null=True, blank=True)
+    project_name = models.CharField(max_length=255, null=True, blank=True)
+    source_of_origin = models.CharField(max_length=255, null=True, blank=True)
+    meta_info = models.JSONField(null=True, blank=True)
+    batch_id = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    reason = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'pending_image_upload'
+        verbose_name_plural = 'Pending Image Uploads'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='pending_upload_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
@@ -4,6 +4,7 @@ from django.utils.timezone import now
 
 from projects.models import Project, ProjectImage
 from jobs.models import Job, JobImage
+from common_utils.jobs.utils import refresh_job_counters
 
 
 class Command(BaseCommand):
@@ -48,6 +49,7 @@ class Command(BaseCommand):
                         for img in project_images
                     ]
                     JobImage.objects.bulk_create(job_images)
+                    refresh_job_counters([job.id])
                     i = i + 1
 
                     self.stdout.write(
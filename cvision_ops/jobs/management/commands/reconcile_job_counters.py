@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from jobs.models import Job
+from common_utils.jobs.utils import refresh_job_counters, JOB_IMAGE_COUNTERS, JOB_PROGRESS_COUNTERS
+
+
+class Command(BaseCommand):
+    help = "Recompute the image and progress counters of jobs from their job images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", type=str, default=None, help="Only reconcile the jobs of this project (name).")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        jobs = Job.objects.all()
+        if options["project"]:
+            jobs = jobs.filter(project__name=options["project"])
+
+        fields = ["id", *JOB_IMAGE_COUNTERS, *JOB_PROGRESS_COUNTERS]
+        before = {row["id"]: row for row in jobs.values(*fields)}
+        job_ids = sorted(before)
+        self.stdout.write(f"Reconciling {len(job_ids)} jobs...")
+
+        chunk_size = options["chunk_size"]
+        for start in range(0, len(job_ids), chunk_size):
+            refresh_job_counters(job_ids[start:start + chunk_size])
+
+        drifted = sum(
+            1 for row in Job.objects.filter(id__in=job_ids).values(*fields)
+            if row != before[row["id"]]
+        )
+        self.stdout.write(self.style.SUCCESS(f"✅ Done: {drifted} of {len(job_ids)} jobs had drifted counters."))
@@ -0,0 +1,68 @@
+# Generated by Django 4.2 on 2026-10-18 13:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+COUNTERS = {
+    'total_images': Q(),
+    'annotated_images': Q(project_image__status='annotated'),
+    'reviewed_images': Q(project_image__status='reviewed'),
+    'dataset_images': Q(project_image__status='dataset'),
+    'null_images': Q(project_image__marked_as_null=True),
+}
+
+
+def populate_counters(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    JobImage = apps.get_model('jobs', 'JobImage')
+    updates = {}
+    for field, condition in COUNTERS.items():
+        counts = (
+            JobImage.objects
+            .filter(condition, job=OuterRef('pk'), project_image__is_active=True)
+            .order_by()
+            .values('job')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        updates[field] = Coalesce(Subquery(counts), Value(0))
+    Job.objects.update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_job_batch_id'),
+        ('projects', '0017_projectimage_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='annotated_images',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='dataset_images',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='null_images',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='reviewed_images',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='total_images',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
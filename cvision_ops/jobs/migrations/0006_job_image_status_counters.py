@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-18 19:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+COUNTERS = {
+    'image_count': Q(),
+    'annotated_image_count': Q(project_image__status='annotated'),
+    'reviewed_image_count': Q(project_image__status='reviewed'),
+    'dataset_image_count': Q(project_image__status='dataset'),
+}
+
+
+def populate_counters(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    JobImage = apps.get_model('jobs', 'JobImage')
+    updates = {}
+    for field, condition in COUNTERS.items():
+        counts = (
+            JobImage.objects
+            .filter(condition, job=OuterRef('pk'))
+            .order_by()
+            .values('job')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        updates[field] = Coalesce(Subquery(counts), Value(0))
+    Job.objects.update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_job_progress_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='annotated_image_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='dataset_image_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='reviewed_image_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
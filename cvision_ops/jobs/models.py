@@ -22,6 +22,20 @@ class Job(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     batch_id = models.CharField(max_length=255, null=True, blank=True)
 
+    # Progress of the job's active images, kept in sync by
+    # common_utils.jobs.utils.refresh_job_counters and the reconcile_job_counters command.
+    total_images = models.PositiveIntegerField(default=0)
+    annotated_images = models.PositiveIntegerField(default=0)
+    reviewed_images = models.PositiveIntegerField(default=0)
+    dataset_images = models.PositiveIntegerField(default=0)
+    null_images = models.PositiveIntegerField(default=0)
+
+    # Status counts over all of the job's images, inactive ones included, like
+    # image_count; used by the job listing. Kept in sync by refresh_job_counters.
+    annotated_image_count = models.PositiveIntegerField(default=0)
+    reviewed_image_count = models.PositiveIntegerField(default=0)
+    dataset_image_count = models.PositiveIntegerField(default=0)
+
     class Meta:
         db_table = "job"
         verbose_name_plural = "Jobs"
@@ -2,6 +2,8 @@
 
 from django.core.management.base import BaseCommand
 from projects.models import ProjectImage
+from jobs.models import JobImage
+from common_utils.jobs.utils import refresh_job_counters
 
 class Command(BaseCommand):
     help = 'Deletes all inactive project images not used in any version.'
@@ -19,6 +21,11 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS("No inactive and unused project images found."))
             return
 
+        # Deleting the project images also removes their job images.
+        job_ids = list(
+            JobImage.objects.filter(project_image__in=unused_images).values_list("job_id", flat=True).distinct()
+        )
         unused_images.delete()
+        refresh_job_counters(job_ids)
 
         self.stdout.write(self.style.SUCCESS(f"Deleted {count} inactive and unused project images."))
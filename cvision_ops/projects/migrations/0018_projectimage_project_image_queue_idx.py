@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0017_projectimage_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projectimage',
+            index=models.Index(fields=['project', 'status', 'is_active', 'added_at'], name='project_image_queue_idx'),
+        ),
+    ]
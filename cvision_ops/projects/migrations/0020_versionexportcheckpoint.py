@@ -0,0 +1,45 @@
+# Generated by Django 4.2 on 2026-10-18 18:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0019_versionexportlock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionExportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=512, unique=True)),
+                ('marker', models.BigIntegerField()),
+                ('offset', models.BigIntegerField()),
+                ('block_count', models.PositiveIntegerField()),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Version Export Checkpoints',
+                'db_table': 'version_export_checkpoint',
+            },
+        ),
+        migrations.CreateModel(
+            name='VersionExportCheckpointSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('records', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('checkpoint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='projects.versionexportcheckpoint')),
+            ],
+            options={
+                'verbose_name_plural': 'Version Export Checkpoint Segments',
+                'db_table': 'version_export_checkpoint_segment',
+                'ordering': ['id'],
+            },
+        ),
+    ]
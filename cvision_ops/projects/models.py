@@ -118,6 +118,9 @@ class ProjectImage(models.Model):
         unique_together = ('project', 'image')
         db_table = 'project_image'
         verbose_name_plural = "Project Images"
+        indexes = [
+            models.Index(fields=['project', 'status', 'is_active', 'added_at'], name='project_image_queue_idx'),
+        ]
         
     def __str__(self):
         return f"{self.project.name} - {self.image.image_name}"
@@ -153,3 +156,63 @@ class VersionImage(models.Model):
 
     def __str__(self):
         return f"{self.version.version_name} - {self.project_image.image.image_name}"
+
+
+class VersionExportLock(models.Model):
+    """
+    Single-flight lease of a version export, one row per export blob.
+
+    The row is held by `owner` (the progress id of the exporting task) until
+    `expires_at`; the owner keeps extending it while the export makes progress,
+    so a crashed export is taken over once its lease runs out.
+    """
+    key = models.CharField(max_length=512, unique=True)
+    owner = models.CharField(max_length=255)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'version_export_lock'
+        verbose_name_plural = 'Version Export Locks'
+
+    def __str__(self):
+        return f"{self.key} ({self.owner})"
+
+
+class VersionExportCheckpoint(models.Model):
+    """
+    Resumable progress of a block-staged export, one row per export blob.
+
+    `marker` is the last version image fully written into the first `offset`
+    archive bytes, which are covered by the first `block_count` staged blocks.
+    The central-directory records of those entries are kept in segments, one
+    per saved checkpoint, so each save only writes the entries added since the
+    previous one.
+    """
+    key = models.CharField(max_length=512, unique=True)
+    marker = models.BigIntegerField()
+    offset = models.BigIntegerField()
+    block_count = models.PositiveIntegerField()
+    entry_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'version_export_checkpoint'
+        verbose_name_plural = 'Version Export Checkpoints'
+
+    def __str__(self):
+        return f"{self.key} @ {self.marker}"
+
+
+class VersionExportCheckpointSegment(models.Model):
+    """Central-directory records of the archive entries added by one checkpoint save."""
+    checkpoint = models.ForeignKey(VersionExportCheckpoint, on_delete=models.CASCADE, related_name='segments')
+    records = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'version_export_checkpoint_segment'
+        verbose_name_plural = 'Version Export Checkpoint Segments'
+        ordering = ['id']